@@ -1,4 +1,4 @@
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 from functools import lru_cache
 
@@ -6,6 +6,8 @@ from functools import lru_cache
 class Settings(BaseSettings):
     """应用配置"""
 
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
+
     # AI Provider
     default_ai_provider: str = "openai"
 
@@ -13,14 +15,18 @@ class Settings(BaseSettings):
     openai_api_key: Optional[str] = None
     openai_model: str = "gpt-4-turbo-preview"
     openai_base_url: str = "https://api.openai.com/v1"
+    # 熔断期间降级使用的备用模型，留空则熔断时直接快速失败
+    openai_fallback_model: Optional[str] = None
 
     # Anthropic
     anthropic_api_key: Optional[str] = None
     anthropic_model: str = "claude-3-opus-20240229"
+    anthropic_fallback_model: Optional[str] = None
 
     # 通义千问
     qwen_api_key: Optional[str] = None
     qwen_model: str = "qwen-max"
+    qwen_fallback_model: Optional[str] = None
 
     # App
     app_host: str = "0.0.0.0"
@@ -31,6 +37,23 @@ class Settings(BaseSettings):
     upload_dir: str = "./uploads"
     report_dir: str = "./reports"
 
+    # 同时解析的文档数上限，防止大文件并发上传耗尽内存
+    doc_parse_concurrency: int = 4
+
+    # 需求分析/用例生成同时在途的 LLM 调用数上限，避免触发提供商限流
+    llm_concurrency: int = 8
+
+    # 需求文档超过该字符数时切块并发分析后合并，避免超长上下文拖慢模型
+    doc_chunk_threshold: int = 12000
+
+    # LLM 返回列表的硬上限，防止模型异常输出撑爆 worker 内存
+    max_requirements: int = 200
+    max_test_cases: int = 2000
+    max_steps_per_case: int = 50
+
+    # Redis（可选）：配置后任务状态存入 Redis，支持多 worker 部署
+    redis_url: Optional[str] = None
+
     # Database (PostgreSQL)
     db_host: str = "localhost"
     db_port: int = 5432
@@ -39,16 +62,14 @@ class Settings(BaseSettings):
     db_password: str = "postgres"
     db_pool_size: int = 5
     db_max_overflow: int = 10
+    # 每次取连接前先 SELECT 1 探活；仅 NAT 超时频繁的网络需要开启
+    db_pool_pre_ping: bool = False
 
     @property
     def database_url(self) -> str:
         """生成数据库连接URL"""
         return f"postgresql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-
 
 @lru_cache()
 def get_settings() -> Settings:
@@ -1,5 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+import sys
+
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, Optional, List
 from enum import Enum
 from datetime import datetime
 
@@ -87,6 +89,12 @@ class TestCaseType(str, Enum):
     MONITOR = "monitor"                         # 监控告警测试
 
 
+# 预先 intern 高频枚举的值字符串，后续字典查找/相等比较走指针快路径
+for _member in (*CheckDimension, *TestCaseType, *TestCasePriority):
+    sys.intern(_member.value)
+del _member
+
+
 class TaskStatus(str, Enum):
     """任务状态"""
     PENDING = "pending"
@@ -95,6 +103,11 @@ class TaskStatus(str, Enum):
     FAILED = "failed"
 
 
+# 任务状态集合，热路径上做成员判断用
+ACTIVE_TASK_STATES = frozenset({TaskStatus.PENDING, TaskStatus.PROCESSING})
+TERMINAL_TASK_STATES = frozenset({TaskStatus.COMPLETED, TaskStatus.FAILED})
+
+
 class Severity(str, Enum):
     """问题严重程度"""
     ERROR = "error"
@@ -121,8 +134,42 @@ class CheckRequest(BaseModel):
     )
 
 
+class StartCheckRequest(BaseModel):
+    """启动检测请求"""
+    document_id: str = Field(..., description="文档 ID")
+    dimensions: List[CheckDimension] = Field(
+        default=[CheckDimension.FORMAT, CheckDimension.CONTENT],
+        description="检测维度"
+    )
+    ai_provider: Optional[str] = Field(
+        default=None,
+        description="AI 提供商: openai / anthropic / qwen"
+    )
+    custom_rules: Optional[str] = Field(
+        default=None,
+        description="自定义检测规则"
+    )
+
+
+class AnalyzeRequest(BaseModel):
+    """需求分析请求"""
+    document_id: str = Field(..., description="文档 ID")
+    ai_provider: Optional[str] = Field(default=None, description="AI 提供商")
+
+
+class GenerateTestCasesRequest(BaseModel):
+    """生成测试用例请求"""
+    document_id: str = Field(..., description="文档 ID")
+    ai_provider: Optional[str] = Field(default=None, description="AI 提供商")
+
+
 # ============ Response Models ============
 
+class StartCheckResponse(BaseModel):
+    """启动检测响应"""
+    task_id: str
+    message: str
+
 class Issue(BaseModel):
     """检测发现的问题"""
     dimension: CheckDimension
@@ -152,11 +199,16 @@ class DocumentInfo(BaseModel):
 
 class TaskResponse(BaseModel):
     """任务响应"""
+    model_config = ConfigDict(defer_build=True)
+
     task_id: str
     status: TaskStatus
     document: DocumentInfo
     progress: int = Field(default=0, ge=0, le=100)
     results: Optional[List[CheckResult]] = None
+    # 检测完成时一次性聚合的各严重级别问题数（键为 Severity.value），
+    # 报告生成直接读取，无需再遍历全部问题
+    severity_counts: Optional[Dict[str, int]] = None
     overall_score: Optional[float] = None
     summary: Optional[str] = None
     created_at: datetime
@@ -165,6 +217,8 @@ class TaskResponse(BaseModel):
 
 class ReportResponse(BaseModel):
     """报告响应"""
+    model_config = ConfigDict(defer_build=True)
+
     task_id: str
     document: DocumentInfo
     overall_score: float
@@ -181,6 +235,8 @@ class ReportResponse(BaseModel):
 
 class TestStep(BaseModel):
     """测试步骤"""
+    model_config = ConfigDict(defer_build=True)
+
     step_number: int = Field(..., description="步骤序号")
     action: str = Field(..., description="操作描述")
     expected_result: str = Field(..., description="预期结果")
@@ -188,6 +244,8 @@ class TestStep(BaseModel):
 
 class TestCase(BaseModel):
     """测试用例"""
+    model_config = ConfigDict(defer_build=True)
+
     case_id: str = Field(..., description="用例编号")
     requirement_id: Optional[str] = Field(default=None, description="关联需求ID")
     title: str = Field(..., description="用例标题")
@@ -201,6 +259,8 @@ class TestCase(BaseModel):
 
 class RequirementItem(BaseModel):
     """需求项"""
+    model_config = ConfigDict(defer_build=True)
+
     req_id: str = Field(..., description="需求ID")
     title: str = Field(..., description="需求标题")
     description: str = Field(..., description="需求描述")
@@ -211,6 +271,8 @@ class RequirementItem(BaseModel):
 
 class RequirementAnalysisResult(BaseModel):
     """需求分析结果"""
+    model_config = ConfigDict(defer_build=True)
+
     total_requirements: int = Field(..., description="需求总数")
     analyzed_requirements: List[RequirementItem] = Field(..., description="分析的需求项")
     completeness_score: float = Field(..., description="完整性得分")
@@ -224,9 +286,19 @@ class RequirementAnalysisResult(BaseModel):
 
 class TestCaseGenerationResult(BaseModel):
     """测试用例生成结果"""
+    model_config = ConfigDict(defer_build=True)
+
     document_id: str
     total_cases: int = Field(..., description="生成的用例总数")
     test_cases: List[TestCase] = Field(..., description="测试用例列表")
     coverage_summary: str = Field(..., description="覆盖情况总结")
     generated_at: datetime
 
+
+class AnalyzeAndGenerateResponse(BaseModel):
+    """需求分析 + 测试用例生成组合结果"""
+    model_config = ConfigDict(defer_build=True)
+
+    analysis: RequirementAnalysisResult = Field(..., description="需求分析结果")
+    testcases: TestCaseGenerationResult = Field(..., description="测试用例生成结果")
+
@@ -1,12 +1,13 @@
 """
 API 路由 - 检测任务
 """
-from typing import List, Optional
-
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse
 
-from app.models import CheckDimension, TaskResponse, TaskStatus
+from app.models import (
+    ACTIVE_TASK_STATES, StartCheckRequest, StartCheckResponse,
+    TaskResponse
+)
 from app.services.check_service import CheckService
 from app.services.document_parser import DocumentParser
 from app.routers.documents import get_document_path, get_document_info
@@ -14,29 +15,6 @@ from app.routers.documents import get_document_path, get_document_info
 router = APIRouter(prefix="/check", tags=["文档检测"])
 
 
-class StartCheckRequest(BaseModel):
-    """启动检测请求"""
-    document_id: str = Field(..., description="文档 ID")
-    dimensions: List[CheckDimension] = Field(
-        default=[CheckDimension.FORMAT, CheckDimension.CONTENT],
-        description="检测维度"
-    )
-    ai_provider: Optional[str] = Field(
-        default=None,
-        description="AI 提供商: openai / anthropic / qwen"
-    )
-    custom_rules: Optional[str] = Field(
-        default=None,
-        description="自定义检测规则"
-    )
-
-
-class StartCheckResponse(BaseModel):
-    """启动检测响应"""
-    task_id: str
-    message: str
-
-
 @router.post("/start", response_model=StartCheckResponse)
 async def start_check(request: StartCheckRequest):
     """
@@ -58,7 +36,7 @@ async def start_check(request: StartCheckRequest):
 
     # 解析文档内容
     try:
-        content, _ = await DocumentParser.parse(doc_path)
+        content, _ = await DocumentParser.parse_cached(doc_path)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"文档解析失败: {str(e)}")
 
@@ -78,36 +56,49 @@ async def start_check(request: StartCheckRequest):
     )
 
 
-@router.get("/{task_id}", response_model=TaskResponse)
+@router.get("/{task_id}", response_model=TaskResponse, response_class=ORJSONResponse)
 async def get_task_status(task_id: str):
     """
     查询检测任务状态
 
     返回任务当前状态、进度和检测结果
     """
-    task = CheckService.get_task(task_id)
+    task = await CheckService.get_task(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
     return task
 
 
-@router.get("/{task_id}/wait", response_model=TaskResponse)
+@router.get("/{task_id}/wait", response_model=TaskResponse, response_class=ORJSONResponse)
 async def wait_for_completion(task_id: str, timeout: int = 60):
     """
-    等待任务完成（轮询）
+    等待任务完成
 
     - **timeout**: 最大等待时间（秒）
     """
     import asyncio
 
-    task = CheckService.get_task(task_id)
+    task = await CheckService.get_task(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
 
-    elapsed = 0
-    while task.status in (TaskStatus.PENDING, TaskStatus.PROCESSING) and elapsed < timeout:
-        await asyncio.sleep(1)
-        elapsed += 1
-        task = CheckService.get_task(task_id)
-
-    return task
+    if task.status in ACTIVE_TASK_STATES:
+        # 任务结束时事件被置位，无需轮询
+        event = CheckService.get_task_event(task_id)
+        if event:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        else:
+            # 事件只存在于创建任务的进程；多 worker 部署下请求落到
+            # 其他进程时拿不到事件，退化为轮询共享存储直到超时
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while loop.time() < deadline:
+                await asyncio.sleep(0.5)
+                task = await CheckService.get_task(task_id)
+                if not task or task.status not in ACTIVE_TASK_STATES:
+                    break
+
+    return await CheckService.get_task(task_id)
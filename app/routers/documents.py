@@ -1,11 +1,15 @@
 """
 API 路由 - 文档管理
 """
+import asyncio
+import hashlib
+import json
 import os
 import uuid
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, UploadFile, File, HTTPException
 import aiofiles
@@ -16,8 +20,56 @@ from app.services.document_parser import DocumentParser
 
 router = APIRouter(prefix="/documents", tags=["文档管理"])
 
-# 简单的内存存储
-_documents: dict = {}
+# 内存中只保留最近使用的文档元数据，完整索引落盘在上传目录的 .meta.json 文件里
+_MAX_CACHED_DOCUMENTS = 256
+_documents: "OrderedDict[str, dict]" = OrderedDict()
+
+# 事件循环只持有任务的弱引用，这里保存强引用防止后台任务执行中被回收
+_background_tasks: set = set()
+
+
+def _meta_path(doc_id: str) -> str:
+    """文档元数据文件路径"""
+    return os.path.join(get_settings().upload_dir, f"{doc_id}.meta.json")
+
+
+def _store_document(doc_id: str, info: DocumentInfo, path: str):
+    """写入磁盘索引并放入 LRU 缓存"""
+    meta = {"info": info.model_dump(mode="json"), "path": path}
+    with open(_meta_path(doc_id), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    _documents[doc_id] = {"info": info, "path": path}
+    _documents.move_to_end(doc_id)
+    while len(_documents) > _MAX_CACHED_DOCUMENTS:
+        _documents.popitem(last=False)
+
+
+def _load_document(doc_id: str) -> Optional[dict]:
+    """优先从缓存取文档记录，未命中时回读磁盘索引"""
+    doc = _documents.get(doc_id)
+    if doc:
+        _documents.move_to_end(doc_id)
+        return doc
+
+    meta_file = _meta_path(doc_id)
+    if not os.path.exists(meta_file):
+        return None
+
+    try:
+        with open(meta_file, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        doc = {
+            "info": DocumentInfo.model_validate(meta["info"]),
+            "path": meta["path"],
+        }
+    except Exception:
+        return None
+
+    _documents[doc_id] = doc
+    while len(_documents) > _MAX_CACHED_DOCUMENTS:
+        _documents.popitem(last=False)
+    return doc
 
 
 @router.post("/upload", response_model=DocumentInfo)
@@ -35,49 +87,75 @@ async def upload_document(file: UploadFile = File(...)):
             detail=f"不支持的文件格式。支持的格式: PDF, DOCX, XLSX, PPTX, TXT, MD"
         )
 
-    # 生成文档 ID
-    doc_id = str(uuid.uuid4())
-
     # 保存文件
     settings = get_settings()
     os.makedirs(settings.upload_dir, exist_ok=True)
 
     ext = Path(file.filename).suffix
-    save_path = os.path.join(settings.upload_dir, f"{doc_id}{ext}")
+    tmp_path = os.path.join(settings.upload_dir, f".{uuid.uuid4()}{ext}.part")
 
-    # 异步保存文件
-    content = await file.read()
-    async with aiofiles.open(save_path, 'wb') as f:
-        await f.write(content)
+    # 异步保存文件（分块写入，避免整个文件驻留内存）
+    file_size = 0
+    async with aiofiles.open(tmp_path, 'wb') as f:
+        while chunk := await file.read(1 << 20):
+            await f.write(chunk)
+            file_size += len(chunk)
 
-    # 解析获取页数
-    try:
-        _, page_count = await DocumentParser.parse(save_path)
-    except Exception:
-        page_count = None
+    # 内容哈希作为文档 ID：同一文件重复上传直接复用已有记录和解析结果
+    # 哈希大文件是 CPU 密集操作，放到线程池里算，避免阻塞事件循环
+    def _digest() -> str:
+        with open(tmp_path, 'rb') as f:
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+
+    doc_id = await asyncio.to_thread(_digest)
+
+    existing = _load_document(doc_id)
+    if existing and os.path.exists(existing["path"]):
+        os.remove(tmp_path)
+        return existing["info"]
 
-    # 创建文档信息
+    save_path = os.path.join(settings.upload_dir, f"{doc_id}{ext}")
+    os.replace(tmp_path, save_path)
+
+    # 创建文档信息（页数在后台解析补充，不阻塞上传响应）
     doc_info = DocumentInfo(
         id=doc_id,
         filename=file.filename,
         file_type=doc_type,
-        file_size=len(content),
-        page_count=page_count,
+        file_size=file_size,
+        page_count=None,
         upload_time=datetime.now()
     )
 
-    _documents[doc_id] = {
-        "info": doc_info,
-        "path": save_path
-    }
+    _store_document(doc_id, doc_info, save_path)
+
+    task = asyncio.create_task(_fill_page_count(doc_id, save_path))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
     return doc_info
 
 
+async def _fill_page_count(doc_id: str, save_path: str):
+    """后台解析文档页数并回填元数据（顺便预热解析缓存）"""
+    try:
+        _, page_count = await DocumentParser.parse_cached(save_path)
+    except Exception:
+        return
+
+    if page_count is None:
+        return
+
+    doc = _load_document(doc_id)
+    if doc:
+        doc["info"].page_count = page_count
+        _store_document(doc_id, doc["info"], doc["path"])
+
+
 @router.get("/{document_id}", response_model=DocumentInfo)
 async def get_document(document_id: str):
     """获取文档信息"""
-    doc = _documents.get(document_id)
+    doc = _load_document(document_id)
     if not doc:
         raise HTTPException(status_code=404, detail="文档不存在")
     return doc["info"]
@@ -86,27 +164,39 @@ async def get_document(document_id: str):
 @router.get("/", response_model=List[DocumentInfo])
 async def list_documents():
     """获取文档列表"""
-    return [doc["info"] for doc in _documents.values()]
+    upload_dir = Path(get_settings().upload_dir)
+    if not upload_dir.exists():
+        return []
+
+    docs = []
+    for meta_file in upload_dir.glob("*.meta.json"):
+        doc = _load_document(meta_file.name[:-len(".meta.json")])
+        if doc:
+            docs.append(doc["info"])
+    return docs
 
 
 @router.delete("/{document_id}")
 async def delete_document(document_id: str):
     """删除文档"""
-    doc = _documents.get(document_id)
+    doc = _load_document(document_id)
     if not doc:
         raise HTTPException(status_code=404, detail="文档不存在")
 
-    # 删除文件
+    # 删除文件与磁盘索引
     if os.path.exists(doc["path"]):
         os.remove(doc["path"])
+    meta_file = _meta_path(document_id)
+    if os.path.exists(meta_file):
+        os.remove(meta_file)
 
-    del _documents[document_id]
+    _documents.pop(document_id, None)
     return {"message": "文档已删除"}
 
 
 def get_document_path(document_id: str) -> str:
     """获取文档文件路径（内部使用）"""
-    doc = _documents.get(document_id)
+    doc = _load_document(document_id)
     if not doc:
         raise HTTPException(status_code=404, detail="文档不存在")
     return doc["path"]
@@ -114,7 +204,7 @@ def get_document_path(document_id: str) -> str:
 
 def get_document_info(document_id: str) -> DocumentInfo:
     """获取文档信息（内部使用）"""
-    doc = _documents.get(document_id)
+    doc = _load_document(document_id)
     if not doc:
         raise HTTPException(status_code=404, detail="文档不存在")
     return doc["info"]
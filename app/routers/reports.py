@@ -1,24 +1,49 @@
 """
 API 路由 - 报告
 """
+from collections import OrderedDict
+
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import HTMLResponse, PlainTextResponse, FileResponse
+from fastapi.responses import (
+    HTMLResponse, PlainTextResponse, FileResponse, ORJSONResponse
+)
 
-from app.models import ReportResponse, TaskStatus
+from app.models import ReportResponse, TaskResponse, TaskStatus
 from app.services.check_service import CheckService
 from app.services.report_generator import ReportGenerator
 
 router = APIRouter(prefix="/reports", tags=["检测报告"])
 
+# 报告生成器无状态，进程内共享一个实例（Jinja2 环境只初始化一次）
+_generator = ReportGenerator()
+
+# 已完成任务的报告数据不可变，按 task_id 缓存避免重复生成
+_MAX_CACHED_REPORTS = 256
+_report_cache: "OrderedDict[str, ReportResponse]" = OrderedDict()
+
+
+def _get_report_data(task: TaskResponse) -> ReportResponse:
+    """生成（或复用）任务的报告数据"""
+    report = _report_cache.get(task.task_id)
+    if report is not None:
+        _report_cache.move_to_end(task.task_id)
+        return report
+
+    report = _generator.generate_report_data(task)
+    _report_cache[task.task_id] = report
+    while len(_report_cache) > _MAX_CACHED_REPORTS:
+        _report_cache.popitem(last=False)
+    return report
+
 
-@router.get("/{task_id}", response_model=ReportResponse)
+@router.get("/{task_id}", response_model=ReportResponse, response_class=ORJSONResponse)
 async def get_report(task_id: str):
     """
     获取检测报告数据
 
     返回 JSON 格式的完整报告数据
     """
-    task = CheckService.get_task(task_id)
+    task = await CheckService.get_task(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
 
@@ -28,8 +53,7 @@ async def get_report(task_id: str):
             detail=f"任务尚未完成，当前状态: {task.status.value}"
         )
 
-    generator = ReportGenerator()
-    return generator.generate_report_data(task)
+    return _get_report_data(task)
 
 
 @router.get("/{task_id}/html", response_class=HTMLResponse)
@@ -39,7 +63,7 @@ async def get_html_report(task_id: str):
 
     返回可直接在浏览器中查看的 HTML 报告
     """
-    task = CheckService.get_task(task_id)
+    task = await CheckService.get_task(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
 
@@ -49,9 +73,8 @@ async def get_html_report(task_id: str):
             detail=f"任务尚未完成，当前状态: {task.status.value}"
         )
 
-    generator = ReportGenerator()
-    report = generator.generate_report_data(task)
-    html_content = generator.render_html(report)
+    report = _get_report_data(task)
+    html_content = _generator.render_html(report)
 
     return HTMLResponse(content=html_content)
 
@@ -61,7 +84,7 @@ async def get_markdown_report(task_id: str):
     """
     获取 Markdown 格式报告
     """
-    task = CheckService.get_task(task_id)
+    task = await CheckService.get_task(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
 
@@ -71,9 +94,8 @@ async def get_markdown_report(task_id: str):
             detail=f"任务尚未完成，当前状态: {task.status.value}"
         )
 
-    generator = ReportGenerator()
-    report = generator.generate_report_data(task)
-    md_content = generator.render_markdown(report)
+    report = _get_report_data(task)
+    md_content = _generator.render_markdown(report)
 
     return PlainTextResponse(
         content=md_content,
@@ -91,7 +113,7 @@ async def download_report(task_id: str, format: str = "html"):
     if format not in ("html", "md"):
         raise HTTPException(status_code=400, detail="不支持的格式，请使用 html 或 md")
 
-    task = CheckService.get_task(task_id)
+    task = await CheckService.get_task(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
 
@@ -101,9 +123,8 @@ async def download_report(task_id: str, format: str = "html"):
             detail=f"任务尚未完成，当前状态: {task.status.value}"
         )
 
-    generator = ReportGenerator()
-    report = generator.generate_report_data(task)
-    filepath = await generator.save_report(report, format)
+    report = _get_report_data(task)
+    filepath = await _generator.save_report(report, format)
 
     return FileResponse(
         path=filepath,
@@ -1,31 +1,46 @@
 """
 API 路由 - 需求分析与测试用例生成
 """
-from typing import Optional, List
+import csv
+import io
+import re
+from datetime import datetime
+from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import PlainTextResponse
-from pydantic import BaseModel, Field
-
-from app.models import RequirementAnalysisResult, TestCaseGenerationResult
-from app.services.requirement_analyzer import RequirementAnalyzer
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+
+from app.models import (
+    AnalyzeRequest, GenerateTestCasesRequest,
+    AnalyzeAndGenerateResponse,
+    RequirementAnalysisResult, TestCaseGenerationResult,
+    TestCasePriority, TestCaseType
+)
+from app.services.requirement_analyzer import get_requirement_analyzer
 from app.services.document_parser import DocumentParser
 from app.services.storage_factory import get_storage
 from app.routers.documents import get_document_path, get_document_info
 
 router = APIRouter(prefix="/requirements", tags=["需求分析"])
 
+# 预计算枚举值映射，导出循环中避免反复走枚举属性查找
+_PRIORITY_VALUES = {p: p.value for p in TestCasePriority}
+_CASE_TYPE_VALUES = {t: t.value for t in TestCaseType}
+
+_PRIORITY_EMOJI = {"P0": "🔴", "P1": "🟠", "P2": "🟡", "P3": "🟢"}
 
-class AnalyzeRequest(BaseModel):
-    """需求分析请求"""
-    document_id: str = Field(..., description="文档 ID")
-    ai_provider: Optional[str] = Field(default=None, description="AI 提供商")
+# AI 返回的 "[标签] 描述" 格式，预编译避免每条问题都走正则缓存
+_ISSUE_TAG_RE = re.compile(r'^\[([^\]]+)\]\s*(.*)$')
 
 
-class GenerateTestCasesRequest(BaseModel):
-    """生成测试用例请求"""
-    document_id: str = Field(..., description="文档 ID")
-    ai_provider: Optional[str] = Field(default=None, description="AI 提供商")
+def _get_score_emoji(score: float) -> str:
+    """按得分返回状态标记"""
+    if score >= 80:
+        return "🟢"
+    elif score >= 60:
+        return "🟡"
+    else:
+        return "🔴"
 
 
 @router.post("/analyze", response_model=RequirementAnalysisResult)
@@ -45,10 +60,10 @@ async def analyze_requirements(request: AnalyzeRequest):
         # 获取文档内容
         doc_path = get_document_path(request.document_id)
         doc_info = get_document_info(request.document_id)
-        content, _ = await DocumentParser.parse(doc_path)
+        content, _ = await DocumentParser.parse_cached(doc_path)
 
         # 分析需求
-        analyzer = RequirementAnalyzer(request.ai_provider)
+        analyzer = get_requirement_analyzer(request.ai_provider)
         result = await analyzer.analyze_requirements(content)
 
         # 保存分析结果到数据库
@@ -91,10 +106,10 @@ async def generate_test_cases(request: GenerateTestCasesRequest):
         # 获取文档内容
         doc_path = get_document_path(request.document_id)
         doc_info = get_document_info(request.document_id)
-        content, _ = await DocumentParser.parse(doc_path)
+        content, _ = await DocumentParser.parse_cached(doc_path)
 
         # 生成测试用例
-        analyzer = RequirementAnalyzer(request.ai_provider)
+        analyzer = get_requirement_analyzer(request.ai_provider)
         result = await analyzer.generate_test_cases(content, request.document_id)
 
         # 保存测试用例结果到数据库
@@ -115,7 +130,48 @@ async def generate_test_cases(request: GenerateTestCasesRequest):
         raise HTTPException(status_code=500, detail=f"测试用例生成失败: {str(e)}")
 
 
-@router.get("/generate-testcases/export")
+@router.post("/analyze-and-generate", response_model=AnalyzeAndGenerateResponse)
+async def analyze_and_generate(request: AnalyzeRequest):
+    """
+    一次调用同时完成需求分析与测试用例生成
+
+    两次 LLM 调用并发执行，整体耗时约等于单独调用中较慢的一次，
+    而非两者之和。
+    """
+    try:
+        # 获取文档内容
+        doc_path = get_document_path(request.document_id)
+        doc_info = get_document_info(request.document_id)
+        content, _ = await DocumentParser.parse_cached(doc_path)
+
+        # 并发执行分析与用例生成
+        analyzer = get_requirement_analyzer(request.ai_provider)
+        analysis, testcases = await analyzer.analyze_and_generate(content, request.document_id)
+
+        # 保存两类结果到数据库
+        storage = get_storage()
+        storage.save_requirement_analysis(
+            document_id=request.document_id,
+            document_name=doc_info.filename,
+            result=analysis.model_dump(),
+            ai_provider=request.ai_provider
+        )
+        storage.save_testcase_generation(
+            document_id=request.document_id,
+            document_name=doc_info.filename,
+            result=testcases.model_dump(),
+            ai_provider=request.ai_provider
+        )
+
+        return AnalyzeAndGenerateResponse(analysis=analysis, testcases=testcases)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"需求分析与用例生成失败: {str(e)}")
+
+
+@router.get("/generate-testcases/export", response_class=ORJSONResponse)
 async def export_test_cases(document_id: str, format: str = "markdown", ai_provider: Optional[str] = None):
     """
     生成并导出测试用例
@@ -128,10 +184,10 @@ async def export_test_cases(document_id: str, format: str = "markdown", ai_provi
         # 获取文档内容
         doc_path = get_document_path(document_id)
         doc_info = get_document_info(document_id)
-        content, _ = await DocumentParser.parse(doc_path)
+        content, _ = await DocumentParser.parse_cached(doc_path)
 
         # 生成测试用例
-        analyzer = RequirementAnalyzer(ai_provider)
+        analyzer = get_requirement_analyzer(ai_provider)
         result = await analyzer.generate_test_cases(content, document_id)
 
         if format == "markdown":
@@ -151,78 +207,93 @@ async def export_test_cases(document_id: str, format: str = "markdown", ai_provi
 
 def _export_markdown(result: TestCaseGenerationResult, filename: str) -> str:
     """导出为 Markdown 格式"""
-    lines = [
-        f"# 测试用例文档",
-        f"",
-        f"**源文档**: {filename}",
-        f"**生成时间**: {result.generated_at.strftime('%Y-%m-%d %H:%M:%S')}",
-        f"**用例总数**: {result.total_cases}",
-        f"",
-        f"## 覆盖情况",
-        f"",
-        f"{result.coverage_summary}",
-        f"",
-        f"---",
-        f"",
-        f"## 测试用例列表",
-        f""
-    ]
-
-    for tc in result.test_cases:
-        priority_emoji = {"P0": "🔴", "P1": "🟠", "P2": "🟡", "P3": "🟢"}
-        emoji = priority_emoji.get(tc.priority.value, "⚪")
-
-        lines.append(f"### {tc.case_id}: {tc.title}")
-        lines.append(f"")
-        lines.append(f"| 属性 | 值 |")
-        lines.append(f"|------|------|")
-        lines.append(f"| **优先级** | {emoji} {tc.priority.value} |")
-        lines.append(f"| **类型** | {tc.case_type.value} |")
-        if tc.requirement_id:
-            lines.append(f"| **关联需求** | {tc.requirement_id} |")
-        if tc.precondition:
-            lines.append(f"| **前置条件** | {tc.precondition} |")
-        if tc.test_data:
-            lines.append(f"| **测试数据** | {tc.test_data} |")
-        if tc.tags:
-            lines.append(f"| **标签** | {', '.join(tc.tags)} |")
-
-        lines.append(f"")
-        lines.append(f"**测试步骤:**")
-        lines.append(f"")
-        lines.append(f"| 步骤 | 操作 | 预期结果 |")
-        lines.append(f"|------|------|----------|")
-
-        for step in tc.steps:
-            lines.append(f"| {step.step_number} | {step.action} | {step.expected_result} |")
-
-        lines.append(f"")
-        lines.append(f"---")
-        lines.append(f"")
-
-    return "\n".join(lines)
+    header = (
+        f"# 测试用例文档\n"
+        f"\n"
+        f"**源文档**: {filename}\n"
+        f"**生成时间**: {result.generated_at.strftime('%Y-%m-%d %H:%M:%S')}\n"
+        f"**用例总数**: {result.total_cases}\n"
+        f"\n"
+        f"## 覆盖情况\n"
+        f"\n"
+        f"{result.coverage_summary}\n"
+        f"\n"
+        f"---\n"
+        f"\n"
+        f"## 测试用例列表\n"
+    )
+
+    # 每个用例生成一个完整的 Markdown 块，最后一次性 join，
+    # 避免大用例集下上万次 list.append
+    def _iter_case_blocks():
+        for tc in result.test_cases:
+            priority = _PRIORITY_VALUES[tc.priority]
+            emoji = _PRIORITY_EMOJI.get(priority, "⚪")
+
+            attrs = [
+                f"| **优先级** | {emoji} {priority} |",
+                f"| **类型** | {_CASE_TYPE_VALUES[tc.case_type]} |",
+            ]
+            if tc.requirement_id:
+                attrs.append(f"| **关联需求** | {tc.requirement_id} |")
+            if tc.precondition:
+                attrs.append(f"| **前置条件** | {tc.precondition} |")
+            if tc.test_data:
+                attrs.append(f"| **测试数据** | {tc.test_data} |")
+            if tc.tags:
+                attrs.append(f"| **标签** | {', '.join(tc.tags)} |")
+
+            steps = "\n".join(
+                f"| {s.step_number} | {s.action} | {s.expected_result} |"
+                for s in tc.steps
+            )
+
+            yield (
+                f"### {tc.case_id}: {tc.title}\n"
+                f"\n"
+                f"| 属性 | 值 |\n"
+                f"|------|------|\n"
+                + "\n".join(attrs) + "\n"
+                f"\n"
+                f"**测试步骤:**\n"
+                f"\n"
+                f"| 步骤 | 操作 | 预期结果 |\n"
+                f"|------|------|----------|\n"
+                f"{steps}\n"
+                f"\n"
+                f"---\n"
+            )
+
+    return header + "\n" + "\n".join(_iter_case_blocks()) + "\n"
 
 
 def _export_csv(result: TestCaseGenerationResult) -> str:
     """导出为 CSV 格式"""
-    lines = ["用例编号,标题,优先级,类型,关联需求,前置条件,测试步骤,预期结果,测试数据,标签"]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_MINIMAL)
+    writer.writerow(["用例编号", "标题", "优先级", "类型", "关联需求",
+                     "前置条件", "测试步骤", "预期结果", "测试数据", "标签"])
 
     for tc in result.test_cases:
-        steps_str = "; ".join([f"{s.step_number}. {s.action}" for s in tc.steps])
-        expected_str = "; ".join([f"{s.step_number}. {s.expected_result}" for s in tc.steps])
-        tags_str = "|".join(tc.tags)
-
-        line = f'"{tc.case_id}","{tc.title}","{tc.priority.value}","{tc.case_type.value}",'
-        line += f'"{tc.requirement_id or ""}","{tc.precondition or ""}",'
-        line += f'"{steps_str}","{expected_str}","{tc.test_data or ""}","{tags_str}"'
-        lines.append(line)
-
-    return "\n".join(lines)
+        writer.writerow([
+            tc.case_id,
+            tc.title,
+            _PRIORITY_VALUES[tc.priority],
+            _CASE_TYPE_VALUES[tc.case_type],
+            tc.requirement_id or "",
+            tc.precondition or "",
+            "; ".join(f"{s.step_number}. {s.action}" for s in tc.steps),
+            "; ".join(f"{s.step_number}. {s.expected_result}" for s in tc.steps),
+            tc.test_data or "",
+            "|".join(tc.tags),
+        ])
+
+    return buffer.getvalue()
 
 
 # ============ 需求分析结果导出 ============
 
-@router.get("/analyze/export")
+@router.get("/analyze/export", response_class=ORJSONResponse)
 async def export_analysis(document_id: str, format: str = "markdown", ai_provider: Optional[str] = None):
     """
     导出需求分析结果
@@ -235,10 +306,10 @@ async def export_analysis(document_id: str, format: str = "markdown", ai_provide
         # 获取文档内容
         doc_path = get_document_path(document_id)
         doc_info = get_document_info(document_id)
-        content, _ = await DocumentParser.parse(doc_path)
+        content, _ = await DocumentParser.parse_cached(doc_path)
 
         # 分析需求
-        analyzer = RequirementAnalyzer(ai_provider)
+        analyzer = get_requirement_analyzer(ai_provider)
         result = await analyzer.analyze_requirements(content)
 
         if format == "markdown":
@@ -255,16 +326,7 @@ async def export_analysis(document_id: str, format: str = "markdown", ai_provide
 
 def _export_analysis_markdown(result: RequirementAnalysisResult, filename: str) -> str:
     """导出需求分析结果为 Markdown 格式"""
-    from datetime import datetime
-
-    # 评分颜色函数
-    def get_score_emoji(score):
-        if score >= 80:
-            return "🟢"
-        elif score >= 60:
-            return "🟡"
-        else:
-            return "🔴"
+    get_score_emoji = _get_score_emoji
 
     lines = [
         f"# 📋 需求分析报告",
@@ -319,8 +381,7 @@ def _export_analysis_markdown(result: RequirementAnalysisResult, filename: str)
             lines.append(f"")
             for issue in req.issues:
                 # 解析问题类型
-                import re
-                match = re.match(r'^\[([^\]]+)\]\s*(.*)$', issue)
+                match = _ISSUE_TAG_RE.match(issue)
                 if match:
                     lines.append(f"- **`{match.group(1)}`** {match.group(2)}")
                 else:
@@ -342,8 +403,7 @@ def _export_analysis_markdown(result: RequirementAnalysisResult, filename: str)
         lines.append(f"")
         for idx, suggestion in enumerate(result.improvement_suggestions, 1):
             # 解析优先级
-            import re
-            match = re.match(r'^\[([^\]]+)\]\s*(.*)$', suggestion)
+            match = _ISSUE_TAG_RE.match(suggestion)
             if match:
                 priority = match.group(1)
                 content = match.group(2)
@@ -1,14 +1,36 @@
 """
 高级需求分析服务 - 需求关联分析、冲突检测、重复检测、历史学习
 """
+import asyncio
 import json
-import hashlib
+import os
+import uuid
+from collections import deque
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from pathlib import Path
 
+import aiofiles
+
 from app.config import get_settings
 from app.services.ai_providers import get_ai_provider
+from app.services.json_utils import parse_llm_json
+
+# orjson（C 实现）序列化/解析比 stdlib 快数倍，且直接输出 bytes；未安装时退回 stdlib
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps_line(obj) -> bytes:
+        return orjson.dumps(obj) + b"\n"
+except ImportError:
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps_line(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8") + b"\n"
 
 
 class AdvancedRequirementAnalyzer:
@@ -193,46 +215,84 @@ class AdvancedRequirementAnalyzer:
         except Exception as e:
             return {"error": str(e), "duplicates": [], "summary": "重复检测失败"}
 
-    def save_analysis_history(self, project_id: str, analysis_result: Dict) -> str:
-        """保存分析历史，用于后续学习"""
-        history_file = self.HISTORY_DIR / f"{project_id}_history.json"
+    # 历史保留条数与压缩频率
+    _MAX_HISTORY = 50
+    _COMPACT_EVERY = 10
 
-        # 加载现有历史
-        history = []
-        if history_file.exists():
-            try:
-                with open(history_file, 'r', encoding='utf-8') as f:
-                    history = json.load(f)
-            except:
-                history = []
+    # 每个项目自上次压缩以来的追加次数
+    _append_counts: Dict[str, int] = {}
+
+    def _history_path(self, project_id: str) -> Path:
+        """历史记录文件路径（JSONL，每行一条记录）"""
+        return self.HISTORY_DIR / f"{project_id}_history.jsonl"
 
-        # 添加新记录
+    async def save_analysis_history(self, project_id: str, analysis_result: Dict) -> str:
+        """保存分析历史，用于后续学习
+
+        追加写单行 JSON，避免每次保存都整读整写历史文件；
+        每追加若干条后在线程池中压缩到最近 _MAX_HISTORY 条。
+        """
         record = {
-            "id": hashlib.md5(str(datetime.now()).encode()).hexdigest()[:8],
+            "id": uuid.uuid4().hex[:8],
             "timestamp": datetime.now().isoformat(),
             "analysis_result": analysis_result
         }
-        history.append(record)
 
-        # 只保留最近50条记录
-        history = history[-50:]
+        history_file = self._history_path(project_id)
+        async with aiofiles.open(history_file, 'ab') as f:
+            await f.write(_json_dumps_line(record))
 
-        # 保存
-        with open(history_file, 'w', encoding='utf-8') as f:
-            json.dump(history, f, ensure_ascii=False, indent=2)
+        count = self._append_counts.get(project_id, 0) + 1
+        if count >= self._COMPACT_EVERY:
+            count = 0
+            await asyncio.to_thread(self._compact_history, history_file)
+        self._append_counts[project_id] = count
 
         return record["id"]
 
-    def get_analysis_history(self, project_id: str) -> List[Dict]:
-        """获取历史分析记录"""
-        history_file = self.HISTORY_DIR / f"{project_id}_history.json"
-
+    @classmethod
+    def _compact_history(cls, history_file: Path):
+        """只保留最近 _MAX_HISTORY 条记录（流式读取，原子替换）"""
         if not history_file.exists():
+            return
+
+        tail = deque(maxlen=cls._MAX_HISTORY)
+        with open(history_file, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    tail.append(line)
+
+        tmp_file = history_file.with_name(history_file.name + ".tmp")
+        with open(tmp_file, 'wb') as f:
+            f.writelines(tail)
+        os.replace(tmp_file, history_file)
+
+    def get_analysis_history(self, project_id: str, limit: Optional[int] = None) -> List[Dict]:
+        """获取历史分析记录（逐行解析，limit 时只保留尾部）"""
+        history_file = self._history_path(project_id)
+        if history_file.exists():
+            lines = deque(maxlen=limit) if limit else []
+            with open(history_file, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        lines.append(line)
+
+            records = []
+            for line in lines:
+                try:
+                    records.append(_json_loads(line))
+                except:
+                    continue
+            return records
+
+        # 兼容旧版整文件 JSON 格式
+        legacy_file = self.HISTORY_DIR / f"{project_id}_history.json"
+        if not legacy_file.exists():
             return []
 
         try:
-            with open(history_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            history = _json_loads(legacy_file.read_bytes())
+            return history[-limit:] if limit else history
         except:
             return []
 
@@ -321,22 +381,7 @@ class AdvancedRequirementAnalyzer:
 
     def _parse_json(self, text: str) -> Dict:
         """解析JSON文本"""
-        text = text.strip()
-
-        # 处理 markdown 代码块
-        if "```" in text:
-            import re
-            json_match = re.search(r'```(?:json)?\s*([\s\S]*?)```', text)
-            if json_match:
-                text = json_match.group(1).strip()
-
-        # 找到JSON对象
-        start_idx = text.find('{')
-        end_idx = text.rfind('}')
-        if start_idx != -1 and end_idx != -1:
-            text = text[start_idx:end_idx + 1]
-
         try:
-            return json.loads(text)
+            return parse_llm_json(text)
         except:
-            return {"error": "JSON解析失败", "raw": text[:500]}
+            return {"error": "JSON解析失败", "raw": text.strip()[:500]}
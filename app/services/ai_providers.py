@@ -1,40 +1,48 @@
 """
 AI 提供商抽象层 - 支持多种 AI 服务的统一接口
 """
+import asyncio
+import hashlib
+import random
+import time
 from abc import ABC, abstractmethod
 from typing import Optional, List
 import json
 
+import httpx
+
 from app.config import get_settings
 from app.models import CheckDimension, CheckResult, Issue, Severity
+from app.services.json_utils import parse_llm_json
+from app.services.llm_cache import LLMResponseCache
 
+# 分析结果缓存：相同 (模型, 维度, 规则, 内容) 的检测结果直接复用
+_analyze_cache = LLMResponseCache(maxsize=1024, ttl=3600)
 
-class BaseAIProvider(ABC):
-    """AI 提供商基类"""
+# 在途请求合并：缓存尚未写入时，相同输入的并发调用等待同一个结果
+_inflight: dict = {}
 
-    @abstractmethod
-    async def analyze(
-        self,
-        content: str,
-        dimension: CheckDimension,
-        custom_rules: Optional[str] = None
-    ) -> CheckResult:
-        """分析文档内容"""
-        pass
+# 重试与熔断参数
+_MAX_ATTEMPTS = 3
+_BACKOFF_BASE = 1.0
+_BACKOFF_CAP = 10.0
+_BREAKER_FAIL_MAX = 5
+_BREAKER_RESET_TIMEOUT = 60.0
 
-    @abstractmethod
-    async def generate_summary(
-        self,
-        content: str,
-        results: List[CheckResult]
-    ) -> str:
-        """生成整体总结"""
-        pass
+# 底层 HTTP 超时：建连 5 秒，整次请求 120 秒，避免提供商偶发故障时
+# 请求无限期挂起占住并发槽位；SDK 自带重试关闭（max_retries=0），
+# 重试次数统一由上面的退避 + 熔断逻辑控制，防止两层重试叠加放大
+_LLM_TIMEOUT = httpx.Timeout(120.0, connect=5.0)
 
-    def _get_dimension_prompt(self, dimension: CheckDimension, custom_rules: Optional[str] = None) -> str:
-        """获取检测维度对应的提示词"""
-        prompts = {
-            CheckDimension.FORMAT: """
+
+def _normalize_for_cache(content: str) -> str:
+    """缓存键用的内容归一化：压缩空白，让仅排版不同的文档命中同一条缓存"""
+    return " ".join(content.split())
+
+
+# 各检测维度的系统提示词：常量内容，import 时构建一次，避免每次请求重建多段长文本
+_DIMENSION_PROMPTS = {
+    CheckDimension.FORMAT: """
 你是一个专业的文档格式审核专家。请对文档进行**严格的格式规范检查**，逐条找出具体问题。
 
 ## 检查清单
@@ -75,7 +83,7 @@ class BaseAIProvider(ABC):
 - 60-74分：格式问题较多，影响文档专业性
 - 60分以下：格式混乱，需要全面整改
 """,
-            CheckDimension.CONTENT: """
+    CheckDimension.CONTENT: """
 你是一个专业的内容质量审核专家。请对文档进行**内容质量深度检查**，找出具体问题。
 
 ## 检查清单
@@ -116,7 +124,7 @@ class BaseAIProvider(ABC):
 - 60-74分：问题较多，需要修改润色
 - 60分以下：内容质量差，需要重写
 """,
-            CheckDimension.LOGIC: """
+    CheckDimension.LOGIC: """
 你是一个专业的逻辑分析专家。请对文档进行**逻辑一致性深度检查**，找出矛盾和问题。
 
 ## 检查清单
@@ -157,7 +165,7 @@ class BaseAIProvider(ABC):
 - 60-74分：存在明显逻辑问题，需要修正
 - 60分以下：逻辑混乱，需要重新梳理
 """,
-            CheckDimension.SENSITIVE: """
+    CheckDimension.SENSITIVE: """
 你是一个专业的信息安全与合规审核专家。请对文档进行**敏感信息安全检查**，找出风险点。
 
 ## 检查清单
@@ -206,7 +214,7 @@ class BaseAIProvider(ABC):
 - 60-74分：存在中等风险，需要处理
 - 60分以下：有高风险敏感信息，必须立即处理
 """,
-            CheckDimension.COMPLIANCE: """
+    CheckDimension.COMPLIANCE: """
 你是一个专业的合规审核专家。请对文档进行**合规性检查**，确保符合规范要求。
 
 ## 检查清单
@@ -247,14 +255,12 @@ class BaseAIProvider(ABC):
 - 60-74分：存在合规风险，需要完善
 - 60分以下：严重不合规，需要全面整改
 """
-        }
-
-        base_prompt = prompts.get(dimension, "请全面审核以下文档内容。")
+}
 
-        if custom_rules:
-            base_prompt += f"\n\n## 📌 额外检查要求（重要）\n{custom_rules}"
+_DEFAULT_PROMPT = "请全面审核以下文档内容。"
 
-        base_prompt += """
+# 统一附加在提示词末尾的输出格式要求
+_OUTPUT_FORMAT_SUFFIX = """
 
 ## 输出格式要求
 
@@ -291,66 +297,255 @@ class BaseAIProvider(ABC):
 
 只返回 JSON，不要其他内容。
 """
-        return base_prompt
+
+# 静态前缀（检查清单 + 输出格式）拼接一次：跨请求字节一致，
+# 才能命中提供商侧的 prompt 前缀缓存
+_STATIC_PROMPTS = {
+    dimension: prompt + _OUTPUT_FORMAT_SUFFIX
+    for dimension, prompt in _DIMENSION_PROMPTS.items()
+}
+_DEFAULT_STATIC_PROMPT = _DEFAULT_PROMPT + _OUTPUT_FORMAT_SUFFIX
+
+
+def _build_batch_prompt(dimensions: List[CheckDimension]) -> str:
+    """构建多维度合并检测的提示词
+
+    多个维度的检查清单组合进同一个 system 提示，文档内容只发送一次，
+    输入 token 成本和 HTTP 往返次数从 N 次降为 1 次。
+    """
+    sections = [
+        "你是一个专业的文档审核专家。请对文档一次性完成以下所有维度的检查，"
+        "各维度的检查要求如下。\n"
+    ]
+    for dimension in dimensions:
+        sections.append(f"\n# 检测维度：{dimension.value}\n")
+        sections.append(_DIMENSION_PROMPTS.get(dimension, _DEFAULT_PROMPT))
+
+    schema_lines = ",\n".join(
+        f'    "{d.value}": {{"score": 85, "summary": "该维度总结（50字以内）", "issues": []}}'
+        for d in dimensions
+    )
+    sections.append(f"""
+
+# 输出格式要求
+
+请以 JSON 格式返回所有维度的检测结果，顶层键为维度名：
+{{
+{schema_lines}
+}}
+
+每个维度的 issues 数组元素格式：
+{{"severity": "error|warning|info", "location": "具体位置", "description": "具体问题描述", "suggestion": "修改建议"}}
+
+只返回 JSON，不要其他内容。
+""")
+    return "".join(sections)
+
+
+class BaseAIProvider(ABC):
+    """AI 提供商基类"""
+
+    def __init__(self):
+        # 熔断器状态：连续失败次数与熔断开始时间
+        self._failure_count = 0
+        self._breaker_opened_at = 0.0
+        # 熔断窗口内降级使用的备用模型，由具体提供商按配置填充
+        self.fallback_model: Optional[str] = None
+
+    async def _call_with_retry(self, func, *args):
+        """带指数退避重试与熔断的调用封装
+
+        瞬时错误（429/500/网络抖动）按指数退避加随机抖动重试；
+        连续失败达到阈值后熔断一段时间，让故障的提供商快速失败
+        而不是反复占用事件循环等待超时。
+        """
+        if self._breaker_opened_at:
+            if time.monotonic() - self._breaker_opened_at < _BREAKER_RESET_TIMEOUT:
+                if self.fallback_model and self.fallback_model != self.model:
+                    # 配置了备用模型时降级响应，而不是直接快速失败；
+                    # 模型按调用传入，不改共享单例上的 self.model
+                    return await func(*args, model=self.fallback_model)
+                raise RuntimeError("AI 提供商连续失败，熔断中，请稍后重试")
+            # 熔断窗口结束，半开状态放行一次试探
+            self._breaker_opened_at = 0.0
+
+        last_exc = None
+        for attempt in range(_MAX_ATTEMPTS):
+            try:
+                result = await func(*args)
+                self._failure_count = 0
+                return result
+            except Exception as e:
+                last_exc = e
+                self._failure_count += 1
+                if self._failure_count >= _BREAKER_FAIL_MAX:
+                    self._breaker_opened_at = time.monotonic()
+                    break
+                if attempt + 1 < _MAX_ATTEMPTS:
+                    # 指数退避 + 随机抖动，避免重试风暴
+                    delay = min(_BACKOFF_CAP, _BACKOFF_BASE * (2 ** attempt))
+                    await asyncio.sleep(random.uniform(0, delay))
+
+        raise last_exc
+
+    def _active_model(self) -> str:
+        """当前实际会使用的模型
+
+        熔断窗口内且配置了备用模型时为备用模型，其余情况为主模型；
+        缓存键用它计算，降级期间的结果不会写到主模型的键下。
+        """
+        if (
+            self._breaker_opened_at
+            and self.fallback_model
+            and time.monotonic() - self._breaker_opened_at < _BREAKER_RESET_TIMEOUT
+        ):
+            return self.fallback_model
+        return self.model
+
+    async def analyze(
+        self,
+        content: str,
+        dimension: CheckDimension,
+        custom_rules: Optional[str] = None
+    ) -> CheckResult:
+        """分析文档内容（带结果缓存与在途请求合并）"""
+        key = self._cache_key(content, dimension, custom_rules)
+
+        cached = _analyze_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # 相同输入已有在途调用时直接等待其结果，避免重复消耗 API 配额
+        inflight = _inflight.get(key)
+        if inflight is not None:
+            return await inflight
+
+        call = asyncio.create_task(
+            self._call_with_retry(self._analyze, content, dimension, custom_rules)
+        )
+        _inflight[key] = call
+        try:
+            result = await call
+        finally:
+            _inflight.pop(key, None)
+
+        _analyze_cache.set(key, result)
+        return result
+
+    async def analyze_batch(
+        self,
+        content: str,
+        dimensions: List[CheckDimension],
+        custom_rules: Optional[str] = None
+    ) -> List[CheckResult]:
+        """单次调用完成多个维度的检测
+
+        文档内容只计一次输入成本，整体耗时为一次生成的延迟。
+        结果按维度写入 analyze() 的缓存；解析失败时由调用方回退逐维度检测。
+        """
+        keys = [self._cache_key(content, d, custom_rules) for d in dimensions]
+        cached = [_analyze_cache.get(k) for k in keys]
+        if all(c is not None for c in cached):
+            return cached
+
+        user = f"请检测以下文档内容：\n\n{content}"
+        if custom_rules:
+            user = f"## 📌 额外检查要求（重要）\n{custom_rules}\n\n{user}"
+
+        response = await self._call_with_retry(self._chat, _build_batch_prompt(dimensions), user)
+
+        data = parse_llm_json(response)
+
+        results = []
+        for key, dimension in zip(keys, dimensions):
+            dim_data = data.get(dimension.value)
+            if not isinstance(dim_data, dict):
+                raise ValueError(f"合并检测结果缺少维度: {dimension.value}")
+            result = self._result_from_data(dim_data, dimension)
+            _analyze_cache.set(key, result)
+            results.append(result)
+
+        return results
+
+    def _cache_key(
+        self,
+        content: str,
+        dimension: CheckDimension,
+        custom_rules: Optional[str] = None
+    ) -> str:
+        """计算分析请求的缓存键（内容做空白归一化）"""
+        payload = (
+            f"{self._active_model()}\x00{dimension.value}\x00{custom_rules or ''}"
+            f"\x00{_normalize_for_cache(content)}"
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @abstractmethod
+    async def _analyze(
+        self,
+        content: str,
+        dimension: CheckDimension,
+        custom_rules: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> CheckResult:
+        """调用 AI 接口执行实际分析（model 为 None 时用主模型）"""
+        pass
+
+    @abstractmethod
+    async def _chat(self, system: str, user: str, model: Optional[str] = None) -> str:
+        """发送一轮对话并返回完整文本（流式累积；model 为 None 时用主模型）"""
+        pass
+
+    @abstractmethod
+    async def generate_summary(
+        self,
+        content: str,
+        results: List[CheckResult]
+    ) -> str:
+        """生成整体总结"""
+        pass
+
+    @staticmethod
+    def _tally(results: List[CheckResult]) -> tuple:
+        """单次遍历统计各严重级别问题数与平均分"""
+        counts = {"error": 0, "warning": 0, "info": 0, "total": 0}
+        score_sum = 0.0
+        for result in results:
+            score_sum += result.score
+            for issue in result.issues:
+                counts[issue.severity.value] += 1
+                counts["total"] += 1
+
+        avg_score = score_sum / len(results) if results else 0
+        return counts, avg_score
+
+    def _get_prompt_parts(
+        self,
+        dimension: CheckDimension,
+        custom_rules: Optional[str] = None
+    ) -> tuple:
+        """获取提示词的 (静态前缀, 动态尾部)
+
+        静态部分（检查清单 + 输出格式）固定在前、自定义规则追加在后，
+        保持跨请求的最长公共前缀，让提供商侧的 prompt 缓存生效。
+        """
+        static_prefix = _STATIC_PROMPTS.get(dimension, _DEFAULT_STATIC_PROMPT)
+        dynamic_tail = (
+            f"\n\n## 📌 额外检查要求（重要）\n{custom_rules}" if custom_rules else ""
+        )
+        return static_prefix, dynamic_tail
+
+    def _get_dimension_prompt(self, dimension: CheckDimension, custom_rules: Optional[str] = None) -> str:
+        """获取检测维度对应的完整提示词"""
+        static_prefix, dynamic_tail = self._get_prompt_parts(dimension, custom_rules)
+        return static_prefix + dynamic_tail
 
     def _parse_result(self, response: str, dimension: CheckDimension) -> CheckResult:
         """解析 AI 返回的结果"""
         try:
-            # 尝试提取 JSON
-            response = response.strip()
-
-            # 处理 markdown 代码块
-            if "```" in response:
-                # 找到 JSON 内容
-                import re
-                json_match = re.search(r'```(?:json)?\s*([\s\S]*?)```', response)
-                if json_match:
-                    response = json_match.group(1).strip()
-
-            # 尝试找到 JSON 对象
-            start_idx = response.find('{')
-            end_idx = response.rfind('}')
-            if start_idx != -1 and end_idx != -1:
-                response = response[start_idx:end_idx + 1]
-
-            data = json.loads(response)
-
-            issues = []
-            for issue_data in data.get("issues", []):
-                # 解析严重程度，提供默认值
-                severity_str = issue_data.get("severity", "info").lower()
-                if severity_str not in ["error", "warning", "info"]:
-                    severity_str = "info"
-
-                issues.append(Issue(
-                    dimension=dimension,
-                    severity=Severity(severity_str),
-                    location=issue_data.get("location", "未指定位置"),
-                    description=issue_data.get("description", ""),
-                    suggestion=issue_data.get("suggestion", "")
-                ))
-
-            # 计算合理的分数
-            score = float(data.get("score", 80))
-            # 确保分数在合理范围内
-            score = max(0, min(100, score))
-
-            # 如果有问题但分数过高，适当调整
-            if issues:
-                error_count = sum(1 for i in issues if i.severity == Severity.ERROR)
-                warning_count = sum(1 for i in issues if i.severity == Severity.WARNING)
-
-                # 根据问题数量调整最高分
-                max_score = 100 - (error_count * 10) - (warning_count * 5)
-                score = min(score, max_score)
-
-            return CheckResult(
-                dimension=dimension,
-                score=score,
-                summary=data.get("summary", "检测完成"),
-                issues=issues
-            )
-        except json.JSONDecodeError as e:
+            data = parse_llm_json(response)
+            return self._result_from_data(data, dimension)
+        except json.JSONDecodeError as e:  # orjson 的解码错误是其子类
             # JSON 解析失败
             return CheckResult(
                 dimension=dimension,
@@ -379,57 +574,106 @@ class BaseAIProvider(ABC):
                 )]
             )
 
+    def _result_from_data(self, data: dict, dimension: CheckDimension) -> CheckResult:
+        """由解析后的 dict 构建单个维度的检测结果"""
+        issues = []
+        for issue_data in data.get("issues", []):
+            # 解析严重程度，提供默认值
+            severity_str = issue_data.get("severity", "info").lower()
+            if severity_str not in ["error", "warning", "info"]:
+                severity_str = "info"
+
+            issues.append(Issue(
+                dimension=dimension,
+                severity=Severity(severity_str),
+                location=issue_data.get("location", "未指定位置"),
+                description=issue_data.get("description", ""),
+                suggestion=issue_data.get("suggestion", "")
+            ))
+
+        # 计算合理的分数
+        score = float(data.get("score", 80))
+        # 确保分数在合理范围内
+        score = max(0, min(100, score))
+
+        # 如果有问题但分数过高，适当调整
+        if issues:
+            error_count = sum(1 for i in issues if i.severity == Severity.ERROR)
+            warning_count = sum(1 for i in issues if i.severity == Severity.WARNING)
+
+            # 根据问题数量调整最高分
+            max_score = 100 - (error_count * 10) - (warning_count * 5)
+            score = min(score, max_score)
+
+        return CheckResult(
+            dimension=dimension,
+            score=score,
+            summary=data.get("summary", "检测完成"),
+            issues=issues
+        )
+
 
 class OpenAIProvider(BaseAIProvider):
     """OpenAI 实现"""
 
     def __init__(self):
+        super().__init__()
         from openai import AsyncOpenAI
         settings = get_settings()
         self.client = AsyncOpenAI(
             api_key=settings.openai_api_key,
-            base_url=settings.openai_base_url
+            base_url=settings.openai_base_url,
+            timeout=_LLM_TIMEOUT,
+            max_retries=0
         )
         self.model = settings.openai_model
+        self.fallback_model = settings.openai_fallback_model
 
-    async def analyze(
+    async def _analyze(
         self,
         content: str,
         dimension: CheckDimension,
-        custom_rules: Optional[str] = None
+        custom_rules: Optional[str] = None,
+        model: Optional[str] = None
     ) -> CheckResult:
         prompt = self._get_dimension_prompt(dimension, custom_rules)
+        response = await self._chat(prompt, f"请检测以下文档内容：\n\n{content}", model=model)
+        return self._parse_result(response, dimension)
 
-        response = await self.client.chat.completions.create(
-            model=self.model,
+    async def _chat(self, system: str, user: str, model: Optional[str] = None) -> str:
+        # 流式接收，边生成边累积，避免等待整段响应后才开始处理
+        stream = await self.client.chat.completions.create(
+            model=model or self.model,
             messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": f"请检测以下文档内容：\n\n{content}"}
+                {"role": "system", "content": system},
+                {"role": "user", "content": user}
             ],
             temperature=0.3,
-            response_format={"type": "json_object"}
+            response_format={"type": "json_object"},
+            stream=True
         )
 
-        result_text = response.choices[0].message.content
-        return self._parse_result(result_text, dimension)
+        parts = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+
+        return "".join(parts)
 
     async def generate_summary(
         self,
         content: str,
         results: List[CheckResult]
     ) -> str:
-        # 统计问题数量
-        total_errors = sum(sum(1 for i in r.issues if i.severity == Severity.ERROR) for r in results)
-        total_warnings = sum(sum(1 for i in r.issues if i.severity == Severity.WARNING) for r in results)
-        total_infos = sum(sum(1 for i in r.issues if i.severity == Severity.INFO) for r in results)
-        avg_score = sum(r.score for r in results) / len(results) if results else 0
+        # 统计问题数量（单次遍历）
+        counts, avg_score = self._tally(results)
 
         results_text = "\n".join([
             f"- {r.dimension.value}: 得分 {r.score:.0f}分, {r.summary}"
             for r in results
         ])
 
-        stats_text = f"问题统计：错误 {total_errors} 个，警告 {total_warnings} 个，提示 {total_infos} 个，平均得分 {avg_score:.0f} 分"
+        stats_text = f"问题统计：错误 {counts['error']} 个，警告 {counts['warning']} 个，提示 {counts['info']} 个，平均得分 {avg_score:.0f} 分"
 
         response = await self.client.chat.completions.create(
             model=self.model,
@@ -448,45 +692,63 @@ class AnthropicProvider(BaseAIProvider):
     """Anthropic Claude 实现"""
 
     def __init__(self):
+        super().__init__()
         from anthropic import AsyncAnthropic
         settings = get_settings()
-        self.client = AsyncAnthropic(api_key=settings.anthropic_api_key)
+        self.client = AsyncAnthropic(
+            api_key=settings.anthropic_api_key,
+            timeout=_LLM_TIMEOUT,
+            max_retries=0
+        )
         self.model = settings.anthropic_model
+        self.fallback_model = settings.anthropic_fallback_model
 
-    async def analyze(
+    async def _analyze(
         self,
         content: str,
         dimension: CheckDimension,
-        custom_rules: Optional[str] = None
+        custom_rules: Optional[str] = None,
+        model: Optional[str] = None
     ) -> CheckResult:
-        prompt = self._get_dimension_prompt(dimension, custom_rules)
-
-        response = await self.client.messages.create(
-            model=self.model,
+        static_prefix, dynamic_tail = self._get_prompt_parts(dimension, custom_rules)
+        user = f"{dynamic_tail}\n\n请检测以下文档内容：\n\n{content}".lstrip()
+        response = await self._chat(static_prefix, user, model=model)
+        return self._parse_result(response, dimension)
+
+    async def _chat(self, system: str, user: str, model: Optional[str] = None) -> str:
+        # 静态 system 打上 cache_control，命中 Anthropic 的 prompt 缓存
+        # 流式接收，边生成边累积
+        parts = []
+        async with self.client.messages.stream(
+            model=model or self.model,
             max_tokens=4096,
+            system=[{
+                "type": "text",
+                "text": system,
+                "cache_control": {"type": "ephemeral"}
+            }],
             messages=[
-                {"role": "user", "content": f"{prompt}\n\n请检测以下文档内容：\n\n{content}"}
+                {"role": "user", "content": user}
             ]
-        )
+        ) as stream:
+            async for text in stream.text_stream:
+                parts.append(text)
 
-        result_text = response.content[0].text
-        return self._parse_result(result_text, dimension)
+        return "".join(parts)
 
     async def generate_summary(
         self,
         content: str,
         results: List[CheckResult]
     ) -> str:
-        total_errors = sum(sum(1 for i in r.issues if i.severity == Severity.ERROR) for r in results)
-        total_warnings = sum(sum(1 for i in r.issues if i.severity == Severity.WARNING) for r in results)
-        avg_score = sum(r.score for r in results) / len(results) if results else 0
+        counts, avg_score = self._tally(results)
 
         results_text = "\n".join([
             f"- {r.dimension.value}: 得分 {r.score:.0f}分, {r.summary}"
             for r in results
         ])
 
-        stats_text = f"问题统计：错误 {total_errors} 个，警告 {total_warnings} 个，平均得分 {avg_score:.0f} 分"
+        stats_text = f"问题统计：错误 {counts['error']} 个，警告 {counts['warning']} 个，平均得分 {avg_score:.0f} 分"
 
         response = await self.client.messages.create(
             model=self.model,
@@ -503,50 +765,61 @@ class QwenProvider(BaseAIProvider):
     """通义千问实现（使用 OpenAI 兼容接口）"""
 
     def __init__(self):
+        super().__init__()
         from openai import AsyncOpenAI
         settings = get_settings()
         self.client = AsyncOpenAI(
             api_key=settings.qwen_api_key,
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1"
+            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
+            timeout=_LLM_TIMEOUT,
+            max_retries=0
         )
         self.model = settings.qwen_model
+        self.fallback_model = settings.qwen_fallback_model
 
-    async def analyze(
+    async def _analyze(
         self,
         content: str,
         dimension: CheckDimension,
-        custom_rules: Optional[str] = None
+        custom_rules: Optional[str] = None,
+        model: Optional[str] = None
     ) -> CheckResult:
         prompt = self._get_dimension_prompt(dimension, custom_rules)
+        response = await self._chat(prompt, f"请检测以下文档内容：\n\n{content}", model=model)
+        return self._parse_result(response, dimension)
 
-        response = await self.client.chat.completions.create(
-            model=self.model,
+    async def _chat(self, system: str, user: str, model: Optional[str] = None) -> str:
+        # 流式接收，边生成边累积
+        stream = await self.client.chat.completions.create(
+            model=model or self.model,
             messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": f"请检测以下文档内容：\n\n{content}"}
+                {"role": "system", "content": system},
+                {"role": "user", "content": user}
             ],
-            temperature=0.3
+            temperature=0.3,
+            stream=True
         )
 
-        result_text = response.choices[0].message.content
-        return self._parse_result(result_text, dimension)
+        parts = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+
+        return "".join(parts)
 
     async def generate_summary(
         self,
         content: str,
         results: List[CheckResult]
     ) -> str:
-        total_errors = sum(sum(1 for i in r.issues if i.severity == Severity.ERROR) for r in results)
-        total_warnings = sum(sum(1 for i in r.issues if i.severity == Severity.WARNING) for r in results)
-        total_infos = sum(sum(1 for i in r.issues if i.severity == Severity.INFO) for r in results)
-        avg_score = sum(r.score for r in results) / len(results) if results else 0
+        counts, avg_score = self._tally(results)
 
         results_text = "\n".join([
             f"- {r.dimension.value}: 得分 {r.score:.0f}分, {r.summary}"
             for r in results
         ])
 
-        stats_text = f"问题统计：错误 {total_errors} 个，警告 {total_warnings} 个，提示 {total_infos} 个，平均得分 {avg_score:.0f} 分"
+        stats_text = f"问题统计：错误 {counts['error']} 个，警告 {counts['warning']} 个，提示 {counts['info']} 个，平均得分 {avg_score:.0f} 分"
 
         response = await self.client.chat.completions.create(
             model=self.model,
@@ -561,21 +834,32 @@ class QwenProvider(BaseAIProvider):
         return response.choices[0].message.content
 
 
+# 每个提供商只创建一个实例：复用底层 httpx 连接池，避免每次检测重建 TCP/TLS 连接
+_provider_cache: dict = {}
+
+
 def get_ai_provider(provider_name: Optional[str] = None) -> BaseAIProvider:
-    """获取 AI 提供商实例"""
+    """获取 AI 提供商实例（按名称缓存的单例）"""
     settings = get_settings()
     provider = provider_name or settings.default_ai_provider
 
+    cached = _provider_cache.get(provider)
+    if cached is not None:
+        return cached
+
     if provider == "openai":
-        return OpenAIProvider()
+        instance = OpenAIProvider()
     elif provider == "anthropic":
         try:
             # 先测试能否导入
             import anthropic
-            return AnthropicProvider()
+            instance = AnthropicProvider()
         except ImportError:
             raise ValueError("anthropic 模块未安装，请运行: pip install anthropic，或选择其他 AI 提供商")
     elif provider == "qwen":
-        return QwenProvider()
+        instance = QwenProvider()
     else:
         raise ValueError(f"不支持的 AI 提供商: {provider}，可选: openai, anthropic, qwen")
+
+    _provider_cache[provider] = instance
+    return instance
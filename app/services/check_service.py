@@ -3,6 +3,7 @@
 """
 import asyncio
 import uuid
+from collections import Counter
 from datetime import datetime
 from typing import Dict, List, Optional
 
@@ -11,11 +12,14 @@ from app.models import (
     TaskResponse
 )
 from app.services.ai_providers import get_ai_provider, BaseAIProvider
+from app.services.task_store import get_task_store
 
 
-# 简单的内存存储（生产环境应使用数据库）
-_tasks: Dict[str, TaskResponse] = {}
-_document_contents: Dict[str, str] = {}
+# 任务完成事件只在本进程内有效：等待接口的推送通知；跨 worker 部署时退化为轮询
+_task_events: Dict[str, asyncio.Event] = {}
+
+# 事件循环只持有任务的弱引用，这里保存强引用防止检测任务执行中被回收
+_background_tasks: set = set()
 
 
 class CheckService:
@@ -43,13 +47,17 @@ class CheckService:
             created_at=datetime.now()
         )
 
-        _tasks[task_id] = task
-        _document_contents[task_id] = content
+        store = get_task_store()
+        await store.put_task(task_id, task)
+        await store.put_content(task_id, content)
+        _task_events[task_id] = asyncio.Event()
 
         # 启动异步检测任务
-        asyncio.create_task(
+        run_task = asyncio.create_task(
             self._run_check(task_id, content, dimensions, ai_provider_name, custom_rules)
         )
+        _background_tasks.add(run_task)
+        run_task.add_done_callback(_background_tasks.discard)
 
         return task_id
 
@@ -62,26 +70,52 @@ class CheckService:
         custom_rules: Optional[str] = None
     ):
         """执行检测任务"""
-        task = _tasks.get(task_id)
+        store = get_task_store()
+        task = await store.get_task(task_id)
         if not task:
             return
 
         try:
             task.status = TaskStatus.PROCESSING
+            await store.put_task(task_id, task)
 
             # 获取 AI 提供商
             ai_provider = self.ai_provider or get_ai_provider(ai_provider_name)
 
-            results: List[CheckResult] = []
             total_dimensions = len(dimensions)
-
-            # 逐维度检测
-            for i, dimension in enumerate(dimensions):
-                result = await ai_provider.analyze(content, dimension, custom_rules)
-                results.append(result)
-
-                # 更新进度
-                task.progress = int((i + 1) / total_dimensions * 90)
+            results: Optional[List[CheckResult]] = None
+
+            # 多维度时优先单次合并调用：文档内容只计一次输入成本，
+            # 整体耗时为一次生成的延迟
+            if total_dimensions > 1:
+                try:
+                    results = await ai_provider.analyze_batch(content, dimensions, custom_rules)
+                    task.progress = 90
+                    await store.put_task(task_id, task)
+                except Exception:
+                    results = None  # 合并结果不完整或超长时回退为逐维度并发检测
+
+            if results is None:
+                # 各维度并发检测：N 次 LLM 往返的耗时从串行累加变为单次耗时
+                analyze_tasks = [
+                    asyncio.create_task(ai_provider.analyze(content, dimension, custom_rules))
+                    for dimension in dimensions
+                ]
+
+                done = 0
+                try:
+                    for completed in asyncio.as_completed(analyze_tasks):
+                        await completed
+                        done += 1
+                        task.progress = int(done / total_dimensions * 90)
+                        await store.put_task(task_id, task)
+                except Exception:
+                    for t in analyze_tasks:
+                        t.cancel()
+                    raise
+
+                # 按请求的维度顺序收集结果
+                results = [t.result() for t in analyze_tasks]
 
             # 生成整体总结
             summary = await ai_provider.generate_summary(content, results)
@@ -89,36 +123,46 @@ class CheckService:
             # 计算整体得分
             overall_score = sum(r.score for r in results) / len(results) if results else 0
 
-            # 更新任务结果
+            # 更新任务结果；严重级别计数在此聚合一次，报告生成直接复用
             task.results = results
+            task.severity_counts = dict(Counter(
+                issue.severity.value for result in results for issue in result.issues
+            ))
             task.overall_score = round(overall_score, 1)
             task.summary = summary
             task.status = TaskStatus.COMPLETED
             task.progress = 100
             task.completed_at = datetime.now()
+            await store.put_task(task_id, task)
 
         except Exception as e:
             task.status = TaskStatus.FAILED
             task.summary = f"检测失败: {str(e)}"
+            await store.put_task(task_id, task)
+        finally:
+            # 通知所有等待该任务的协程；随后移除事件防止字典无限增长
+            # （等待方自己持有引用，任务结束后新请求走存储里的终态短路）
+            event = _task_events.pop(task_id, None)
+            if event:
+                event.set()
 
     @staticmethod
-    def get_task(task_id: str) -> Optional[TaskResponse]:
+    async def get_task(task_id: str) -> Optional[TaskResponse]:
         """获取任务状态"""
-        return _tasks.get(task_id)
+        return await get_task_store().get_task(task_id)
 
     @staticmethod
-    def get_task_content(task_id: str) -> Optional[str]:
+    def get_task_event(task_id: str) -> Optional[asyncio.Event]:
+        """获取任务完成事件（任务结束时被置位）"""
+        return _task_events.get(task_id)
+
+    @staticmethod
+    async def get_task_content(task_id: str) -> Optional[str]:
         """获取任务对应的文档内容"""
-        return _document_contents.get(task_id)
+        return await get_task_store().get_content(task_id)
 
     @staticmethod
     def calculate_issue_counts(results: List[CheckResult]) -> Dict[str, int]:
         """统计问题数量"""
-        counts = {"error": 0, "warning": 0, "info": 0, "total": 0}
-
-        for result in results:
-            for issue in result.issues:
-                counts[issue.severity.value] += 1
-                counts["total"] += 1
-
+        counts, _ = BaseAIProvider._tally(results)
         return counts
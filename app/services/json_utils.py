@@ -0,0 +1,69 @@
+"""
+JSON 工具 - 统一解析 LLM 返回的 JSON 文本
+"""
+import json
+import re
+
+# orjson（C 实现）解析大段 LLM 响应比 stdlib 快数倍；未安装时退回 stdlib
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# markdown 代码块中的 JSON 内容
+_JSON_FENCE_RE = re.compile(r'```(?:json)?\s*([\s\S]*?)```')
+
+
+def extract_json_object(text: str) -> str:
+    """单次扫描提取第一个完整的 JSON 对象
+
+    跟踪大括号深度并跳过字符串字面量，避免 rfind('}') 把字符串里的
+    大括号误当作结束符。未找到完整对象时原样返回剩余文本。
+    """
+    start = text.find('{')
+    if start == -1:
+        return text
+
+    depth = 0
+    in_string = False
+    escape = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+
+    return text[start:]
+
+
+def parse_llm_json(text: str) -> dict:
+    """从 LLM 响应文本中提取并解析 JSON 对象
+
+    处理 markdown 代码块包裹和前后缀杂文；整段已是干净 JSON 时直接解析。
+    解析失败抛出 json.JSONDecodeError（orjson 的解码错误是其子类）。
+    """
+    text = text.strip()
+
+    # 处理 markdown 代码块（快路径：多数响应没有代码块，直接跳过正则）
+    if "```" in text:
+        json_match = _JSON_FENCE_RE.search(text)
+        if json_match:
+            text = json_match.group(1).strip()
+
+    if not (text.startswith('{') and text.endswith('}')):
+        text = extract_json_object(text)
+
+    return _json_loads(text)
@@ -0,0 +1,36 @@
+"""
+LLM 响应缓存 - 进程内 LRU + TTL 缓存，避免相同输入重复调用 AI 接口
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class LLMResponseCache:
+    """简单的 LRU + TTL 缓存"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """取缓存值，过期返回 None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
@@ -2,18 +2,36 @@
 PostgreSQL 数据库存储服务 - 使用 SQLAlchemy ORM
 """
 import json
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+import re
+import threading
+from typing import Dict, List, Optional, Any, Tuple
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine, Column, Integer, String, Text, Float, DateTime, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy import create_engine, func, insert, select, text, Column, Index, Integer, String, Text, Float, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import DeclarativeBase, sessionmaker, relationship, selectinload
 from sqlalchemy.pool import QueuePool
 
 from app.config import get_settings
 
-Base = declarative_base()
+# orjson 直接产出 UTF-8（等价 ensure_ascii=False）且编解码为 C 实现，
+# 未安装时退回标准库
+try:
+    import orjson
+
+    def _json_dumps(value) -> str:
+        return orjson.dumps(value, default=str).decode()
+
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(value) -> str:
+        return json.dumps(value, ensure_ascii=False, default=str)
+
+    _json_loads = json.loads
+
+
+class Base(DeclarativeBase):
+    pass
 
 
 # ============ 数据库模型 ============
@@ -23,12 +41,17 @@ class RequirementAnalysisRecord(Base):
     需求分析记录表 - 存储每次需求文档分析的结果
     """
     __tablename__ = 'requirement_analysis'
-    __table_args__ = {'comment': '需求分析记录表 - 存储每次需求文档分析的主记录'}
+    __table_args__ = (
+        # 历史查询按 document_id 过滤、analysis_time 倒序取前 N 条，
+        # 复合索引反向扫描即可命中，省去每次查询的排序
+        Index('ix_req_analysis_doc_time', 'document_id', 'analysis_time'),
+        {'comment': '需求分析记录表 - 存储每次需求文档分析的主记录'},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, comment='主键ID')
-    document_id = Column(String(100), nullable=False, index=True, comment='文档唯一标识')
+    document_id = Column(String(100), nullable=False, comment='文档唯一标识')
     document_name = Column(String(255), comment='文档名称')
-    analysis_time = Column(DateTime, default=datetime.now, comment='分析时间')
+    analysis_time = Column(DateTime, server_default=func.now(), comment='分析时间')
     ai_provider = Column(String(50), comment='AI提供商(qwen/openai/anthropic)')
 
     # 需求统计
@@ -61,7 +84,7 @@ class RequirementAnalysisRecord(Base):
 
     # 总结
     summary = Column(Text, comment='分析总结')
-    improvement_suggestions = Column(Text, comment='改进建议(JSON数组)')
+    improvement_suggestions = Column(JSONB, comment='改进建议(JSON数组)')
 
     # 关联需求项
     requirements = relationship("RequirementItem", back_populates="analysis", cascade="all, delete-orphan")
@@ -87,8 +110,8 @@ class RequirementItem(Base):
     medium_risk_count = Column(Integer, default=0, comment='中风险问题数量')
     low_risk_count = Column(Integer, default=0, comment='低风险问题数量')
 
-    issues = Column(Text, comment='发现的问题列表(JSON数组)')
-    suggestions = Column(Text, comment='改进建议列表(JSON数组)')
+    issues = Column(JSONB, comment='发现的问题列表(JSON数组)')
+    suggestions = Column(JSONB, comment='改进建议列表(JSON数组)')
 
     analysis = relationship("RequirementAnalysisRecord", back_populates="requirements")
 
@@ -98,12 +121,16 @@ class TestCaseGenerationRecord(Base):
     测试用例生成记录表 - 存储每次测试用例生成的结果
     """
     __tablename__ = 'testcase_generation'
-    __table_args__ = {'comment': '测试用例生成记录表 - 存储每次测试用例生成的主记录'}
+    __table_args__ = (
+        # 历史查询按 document_id 过滤、generation_time 倒序取前 N 条
+        Index('ix_testcase_gen_doc_time', 'document_id', 'generation_time'),
+        {'comment': '测试用例生成记录表 - 存储每次测试用例生成的主记录'},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, comment='主键ID')
-    document_id = Column(String(100), nullable=False, index=True, comment='文档唯一标识')
+    document_id = Column(String(100), nullable=False, comment='文档唯一标识')
     document_name = Column(String(255), comment='文档名称')
-    generation_time = Column(DateTime, default=datetime.now, comment='生成时间')
+    generation_time = Column(DateTime, server_default=func.now(), comment='生成时间')
     ai_provider = Column(String(50), comment='AI提供商(qwen/openai/anthropic)')
 
     # 用例统计
@@ -148,13 +175,93 @@ class TestCaseItem(Base):
     priority = Column(String(10), comment='优先级(P0/P1/P2/P3)')
     case_type = Column(String(50), comment='用例类型(functional/security/boundary等)')
     precondition = Column(Text, comment='前置条件')
-    steps = Column(Text, comment='测试步骤(JSON数组)')
+    steps = Column(JSONB, comment='测试步骤(JSON数组)')
     test_data = Column(Text, comment='测试数据')
-    tags = Column(Text, comment='标签(JSON数组)')
+    tags = Column(JSONB, comment='标签(JSON数组)')
 
     generation = relationship("TestCaseGenerationRecord", back_populates="test_cases")
 
 
+# 明细表 INSERT 语句构造一次复用，保存热路径省去逐次构造
+_REQ_ITEM_INSERT = insert(RequirementItem)
+_TC_ITEM_INSERT = insert(TestCaseItem)
+
+# 对象类型 → 转 dict 方法（model_dump / dict / 无），按类型解析一次后复用
+_DUMPER_CACHE: Dict[type, Optional[Any]] = {}
+
+
+def _as_dict(obj):
+    """把 Pydantic 模型（v2/v1）统一转成 dict，普通 dict 原样返回"""
+    obj_type = type(obj)
+    try:
+        dumper = _DUMPER_CACHE[obj_type]
+    except KeyError:
+        dumper = getattr(obj_type, 'model_dump', None) or getattr(obj_type, 'dict', None)
+        _DUMPER_CACHE[obj_type] = dumper
+    return dumper(obj) if dumper is not None else obj
+
+
+# ============ 问题统计关键词 ============
+
+# 问题类型标签映射 - 匹配AI返回的[标签]格式
+# AI返回格式示例: "[业务流程断点] 具体描述..."
+_ISSUE_TYPE_KEYWORDS = {
+    'flow_break_count': ['业务流程断点', '流程断点', '用户旅程中断', '流程不闭环'],
+    'rule_unclear_count': ['规则不明确', '规则不清', '计算规则', '业务规则缺失', '规则缺失'],
+    'status_unclear_count': ['状态定义不清', '状态不明确', '状态流转不清'],
+    'concurrent_missing_count': ['并发场景遗漏', '并发场景', '多人操作', '操作冲突'],
+    'reverse_flow_missing_count': ['逆向流程缺失', '逆向流程', '退款规则', '取消规则', '退换规则', '撤销'],
+    'operation_missing_count': ['运营能力缺失', '运营能力', '后台管理', '运营后台', '人工干预'],
+    'notify_missing_count': ['通知机制缺失', '通知机制', '消息通知', '通知策略'],
+    'exception_missing_count': ['异常处理缺失', '异常处理', '异常场景', '资金流转遗漏', '库存回滚', '售后衔接'],
+    'boundary_missing_count': ['边界场景遗漏', '边界场景', '边界条件', '数据边界'],
+}
+
+# 合并为单个交替正则：一次 C 层扫描找出命中的类型关键词，
+# 代替逐类别逐关键词的 Python 子串探测；长关键词在前保证优先匹配。
+# 整体包在零宽先行断言里，匹配不消耗字符，重叠命中（如"退款规则不明确"
+# 同时含"退款规则"和"规则不明确"）都能被看到，归类结果与逐关键词探测一致
+_ISSUE_TYPE_RE = re.compile('(?=(' + '|'.join(
+    re.escape(kw)
+    for kw in sorted(
+        (kw for keywords in _ISSUE_TYPE_KEYWORDS.values() for kw in keywords),
+        key=len, reverse=True
+    )
+) + '))')
+
+# 关键词 → (类别优先序, 统计字段)，多个类别同时命中时取先声明的类别
+_KEYWORD_CATEGORY = {
+    kw: (index, stat_key)
+    for index, (stat_key, keywords) in enumerate(_ISSUE_TYPE_KEYWORDS.items())
+    for kw in keywords
+}
+
+# 高风险标签/关键词 - 涉及资金、安全、核心流程
+_HIGH_RISK_RE = re.compile('|'.join(map(
+    re.escape, ['资金流转', '退款规则', '支付', '账户', '密码', '权限', '安全', '资金']
+)))
+# 低风险标签 - 建议性的改进
+_LOW_RISK_RE = re.compile('|'.join(map(re.escape, ['建议', '优化建议', '可选'])))
+
+# 用例优先级 → 统计字段，未识别的归入 P3
+_TC_PRIORITY_KEYS = {'P0': 'p0_count', 'P1': 'p1_count', 'P2': 'p2_count'}
+
+# 用例类型关键词合并为命名分组正则，一次扫描代替逐类别子串探测；
+# 分组顺序即类别优先序，与原 if/elif 链一致
+_TC_TYPE_RE = re.compile(
+    r'(?P<functional_count>functional|smoke|regression)'
+    r'|(?P<boundary_count>boundary)'
+    r'|(?P<exception_count>exception)'
+    r'|(?P<security_count>security|sql|xss|auth)'
+    r'|(?P<performance_count>performance|load|stress|concurrent)'
+    r'|(?P<compatibility_count>compat)'
+    r'|(?P<api_count>api)'
+    r'|(?P<ui_count>ui)'
+    r'|(?P<data_count>data)'
+)
+_TC_TYPE_PRIORITY = {name: index for index, name in enumerate(_TC_TYPE_RE.groupindex)}
+
+
 # ============ 数据库存储服务 ============
 
 class PostgresStorage:
@@ -165,6 +272,8 @@ class PostgresStorage:
     _SessionLocal = None
     _connected = False
     _connection_error = None
+    _tables_created = False
+    _connect_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
@@ -177,15 +286,28 @@ class PostgresStorage:
             return
 
         self._initialized = True
+        # 配置快照一次，重连路径不再逐次经过 Pydantic 属性访问
+        self._cfg = get_settings()
         self._try_connect()
 
     def _try_connect(self):
-        """尝试连接数据库"""
+        """尝试连接数据库
+
+        加锁串行化重连：数据库短暂不可用恢复后，并发请求不会同时发起
+        多次 SELECT 1 探测与建表。
+        """
         if self._connected:
             return True
-            
-        settings = get_settings()
-        
+
+        with self._connect_lock:
+            return self._try_connect_locked()
+
+    def _try_connect_locked(self):
+        if self._connected:
+            return True
+
+        settings = self._cfg
+
         try:
             # 创建数据库引擎
             self._engine = create_engine(
@@ -193,21 +315,40 @@ class PostgresStorage:
                 poolclass=QueuePool,
                 pool_size=settings.db_pool_size,
                 max_overflow=settings.db_max_overflow,
-                pool_pre_ping=True,  # 连接前检查
+                pool_pre_ping=settings.db_pool_pre_ping,
+                # 连接可用性交给 TCP keepalive 与定期回收，省去每次取
+                # 连接前的 SELECT 1 往返
+                pool_recycle=1800,
+                connect_args={
+                    "keepalives": 1,
+                    "keepalives_idle": 30,
+                    "keepalives_interval": 10,
+                    "keepalives_count": 3,
+                },
+                # 批量写入时把多行 INSERT 重写为单条多值语句，减少与库的往返；
+                # values 路径在 SQLAlchemy 2.0 里由 insertmanyvalues 接管，
+                # 分页大小用 insertmanyvalues_page_size 控制
+                executemany_mode="values_plus_batch",
+                executemany_batch_page_size=500,
+                insertmanyvalues_page_size=500,
+                # JSONB 序列化：中文不转义，枚举等不可序列化对象退化为 str
+                json_serializer=_json_dumps,
+                json_deserializer=_json_loads,
                 echo=False
             )
             
             # 测试连接
-            from sqlalchemy import text
             with self._engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
             
             # 创建会话工厂
             self._SessionLocal = sessionmaker(bind=self._engine)
             
-            # 创建表
-            Base.metadata.create_all(self._engine)
-            
+            # 创建表（进程内只执行一次，重连不重复走 DDL 内省）
+            if not PostgresStorage._tables_created:
+                Base.metadata.create_all(self._engine)
+                PostgresStorage._tables_created = True
+
             self._connected = True
             self._connection_error = None
             print(f"[数据库] 已连接: {settings.db_host}:{settings.db_port}/{settings.db_name}")
@@ -245,8 +386,46 @@ class PostgresStorage:
         finally:
             session.close()
 
-    def _count_issues(self, requirements: List[Dict]) -> Dict:
-        """统计问题数量 - 基于AI返回的[标签]格式进行统计"""
+    # 明细行数达到该阈值时改用 COPY 写入，绕过逐行解析/执行计划开销
+    _COPY_THRESHOLD = 500
+
+    @staticmethod
+    def _bulk_copy(session, table_name: str, columns: List[str], rows: List[Dict]):
+        """通过 COPY FROM STDIN 批量写入（走 psycopg2 原生连接）
+
+        行先序列化为内存中的 CSV；None 写出为 \\N 哨兵并在 COPY 端声明
+        NULL '\\N'，这样空字符串保持为空字符串而不是被当成 NULL，
+        与小批量 executemany 路径落库结果一致；list/dict 值序列化为
+        JSON 文本写入 JSONB 列。
+        """
+        import csv
+        import io
+
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for row in rows:
+            writer.writerow([
+                '\\N' if value is None
+                else _json_dumps(value) if isinstance(value, (list, dict))
+                else value
+                for value in (row[col] for col in columns)
+            ])
+        buf.seek(0)
+
+        raw_conn = session.connection().connection
+        with raw_conn.cursor() as cur:
+            cur.copy_expert(
+                f"COPY {table_name}({','.join(columns)}) "
+                "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buf
+            )
+
+    def _count_issues(self, requirements: List[Dict]) -> Tuple[Dict, List[Dict]]:
+        """统计问题数量 - 基于AI返回的[标签]格式进行统计
+
+        返回 (整体统计, 与 requirements 对齐的各需求风险计数)，
+        单次遍历同时产出两份结果，每条问题文本只扫描一遍。
+        """
         stats = {
             'total_issues': 0,
             'high_risk_count': 0,
@@ -264,72 +443,43 @@ class PostgresStorage:
             'other_issue_count': 0,
         }
 
-        # 问题类型标签映射 - 匹配AI返回的[标签]格式
-        # AI返回格式示例: "[业务流程断点] 具体描述..."
-        issue_type_map = {
-            'flow_break_count': ['业务流程断点', '流程断点', '用户旅程中断', '流程不闭环'],
-            'rule_unclear_count': ['规则不明确', '规则不清', '计算规则', '业务规则缺失', '规则缺失'],
-            'status_unclear_count': ['状态定义不清', '状态不明确', '状态流转不清'],
-            'concurrent_missing_count': ['并发场景遗漏', '并发场景', '多人操作', '操作冲突'],
-            'reverse_flow_missing_count': ['逆向流程缺失', '逆向流程', '退款规则', '取消规则', '退换规则', '撤销'],
-            'operation_missing_count': ['运营能力缺失', '运营能力', '后台管理', '运营后台', '人工干预'],
-            'notify_missing_count': ['通知机制缺失', '通知机制', '消息通知', '通知策略'],
-            'exception_missing_count': ['异常处理缺失', '异常处理', '异常场景', '资金流转遗漏', '库存回滚', '售后衔接'],
-            'boundary_missing_count': ['边界场景遗漏', '边界场景', '边界条件', '数据边界'],
-        }
-
-        # 高风险标签/关键词 - 涉及资金、安全、核心流程
-        high_risk_tags = ['资金流转', '退款规则', '支付', '账户', '密码', '权限', '安全', '资金']
-        # 低风险标签 - 建议性的改进
-        low_risk_tags = ['建议', '优化建议', '可选']
+        per_req_stats: List[Dict] = []
 
         for req in requirements:
             issues = req.get('issues', [])
+            per_req = {'high': 0, 'medium': 0, 'low': 0}
             for issue in issues:
                 issue_text = str(issue)
                 stats['total_issues'] += 1
 
                 # 判断风险等级
-                is_high_risk = any(tag in issue_text for tag in high_risk_tags)
-                is_low_risk = any(tag in issue_text for tag in low_risk_tags) and not is_high_risk
+                is_high_risk = _HIGH_RISK_RE.search(issue_text) is not None
+                is_low_risk = not is_high_risk and _LOW_RISK_RE.search(issue_text) is not None
 
                 if is_high_risk:
                     stats['high_risk_count'] += 1
+                    per_req['high'] += 1
                 elif is_low_risk:
                     stats['low_risk_count'] += 1
+                    per_req['low'] += 1
                 else:
                     stats['medium_risk_count'] += 1
-
-                # 匹配问题类型 - 按照关键词匹配
-                matched = False
-                for stat_key, keywords in issue_type_map.items():
-                    if any(kw in issue_text for kw in keywords):
-                        stats[stat_key] += 1
-                        matched = True
-                        break
-                if not matched:
+                    per_req['medium'] += 1
+
+                # 匹配问题类型 - 单次扫描取出命中的关键词，按类别优先序归类
+                best = None
+                for m in _ISSUE_TYPE_RE.finditer(issue_text):
+                    category = _KEYWORD_CATEGORY[m.group(1)]
+                    if best is None or category[0] < best[0]:
+                        best = category
+                if best is not None:
+                    stats[best[1]] += 1
+                else:
                     stats['other_issue_count'] += 1
 
-        return stats
+            per_req_stats.append(per_req)
 
-    def _count_req_issues(self, issues: List[str]) -> Dict:
-        """统计单个需求的问题风险等级"""
-        high_risk_tags = ['资金流转', '退款规则', '支付', '账户', '密码', '权限', '安全', '资金']
-        low_risk_tags = ['建议', '优化建议', '可选']
-
-        result = {'high': 0, 'medium': 0, 'low': 0}
-        for issue in issues:
-            issue_text = str(issue)
-            is_high_risk = any(tag in issue_text for tag in high_risk_tags)
-            is_low_risk = any(tag in issue_text for tag in low_risk_tags) and not is_high_risk
-
-            if is_high_risk:
-                result['high'] += 1
-            elif is_low_risk:
-                result['low'] += 1
-            else:
-                result['medium'] += 1
-        return result
+        return stats, per_req_stats
 
     def save_requirement_analysis(
         self,
@@ -341,16 +491,10 @@ class PostgresStorage:
         """保存需求分析结果"""
         with self.get_session() as session:
             # 处理需求项
-            analyzed_reqs = []
-            for req in result.get('analyzed_requirements', []):
-                if hasattr(req, 'model_dump'):
-                    req = req.model_dump()
-                elif hasattr(req, 'dict'):
-                    req = req.dict()
-                analyzed_reqs.append(req)
+            analyzed_reqs = [_as_dict(req) for req in result.get('analyzed_requirements', [])]
 
-            # 统计问题
-            stats = self._count_issues(analyzed_reqs)
+            # 统计问题（整体统计与各需求风险计数一次遍历得出）
+            stats, per_req_stats = self._count_issues(analyzed_reqs)
 
             # 创建主记录
             record = RequirementAnalysisRecord(
@@ -381,30 +525,33 @@ class PostgresStorage:
                 testability_score=result.get('testability_score', 0),
                 overall_score=result.get('overall_score', 0),
                 summary=result.get('summary', ''),
-                improvement_suggestions=json.dumps(result.get('improvement_suggestions', []), ensure_ascii=False)
+                improvement_suggestions=result.get('improvement_suggestions', [])
             )
             session.add(record)
             session.flush()
 
-            # 创建需求项明细
-            for req in analyzed_reqs:
+            # 创建需求项明细 - Core 批量插入，避免逐行 add 产生 N 条 INSERT
+            rows = []
+            for req, issue_stats in zip(analyzed_reqs, per_req_stats):
                 issues = req.get('issues', [])
-                issue_stats = self._count_req_issues(issues)
-
-                item = RequirementItem(
-                    analysis_id=record.id,
-                    req_id=req.get('req_id', ''),
-                    title=req.get('title', ''),
-                    description=req.get('description', ''),
-                    priority=req.get('priority'),
-                    issue_count=len(issues),
-                    high_risk_count=issue_stats['high'],
-                    medium_risk_count=issue_stats['medium'],
-                    low_risk_count=issue_stats['low'],
-                    issues=json.dumps(issues, ensure_ascii=False),
-                    suggestions=json.dumps(req.get('suggestions', []), ensure_ascii=False)
-                )
-                session.add(item)
+
+                rows.append({
+                    'analysis_id': record.id,
+                    'req_id': req.get('req_id', ''),
+                    'title': req.get('title', ''),
+                    'description': req.get('description', ''),
+                    'priority': req.get('priority'),
+                    'issue_count': len(issues),
+                    'high_risk_count': issue_stats['high'],
+                    'medium_risk_count': issue_stats['medium'],
+                    'low_risk_count': issue_stats['low'],
+                    'issues': issues,
+                    'suggestions': req.get('suggestions', [])
+                })
+            if len(rows) >= self._COPY_THRESHOLD:
+                self._bulk_copy(session, RequirementItem.__tablename__, list(rows[0]), rows)
+            elif rows:
+                session.execute(_REQ_ITEM_INSERT, rows)
 
             return record.id
 
@@ -421,40 +568,21 @@ class PostgresStorage:
             priority = tc.get('priority', 'P2')
             if hasattr(priority, 'value'):
                 priority = priority.value
-            priority = str(priority).upper()
-
-            if priority == 'P0':
-                stats['p0_count'] += 1
-            elif priority == 'P1':
-                stats['p1_count'] += 1
-            elif priority == 'P2':
-                stats['p2_count'] += 1
-            else:
-                stats['p3_count'] += 1
+            stats[_TC_PRIORITY_KEYS.get(str(priority).upper(), 'p3_count')] += 1
 
             case_type = tc.get('case_type', 'functional')
             if hasattr(case_type, 'value'):
                 case_type = case_type.value
             case_type = str(case_type).lower()
 
-            if 'functional' in case_type or 'smoke' in case_type or 'regression' in case_type:
-                stats['functional_count'] += 1
-            elif 'boundary' in case_type:
-                stats['boundary_count'] += 1
-            elif 'exception' in case_type:
-                stats['exception_count'] += 1
-            elif 'security' in case_type or 'sql' in case_type or 'xss' in case_type or 'auth' in case_type:
-                stats['security_count'] += 1
-            elif 'performance' in case_type or 'load' in case_type or 'stress' in case_type or 'concurrent' in case_type:
-                stats['performance_count'] += 1
-            elif 'compat' in case_type:
-                stats['compatibility_count'] += 1
-            elif 'api' in case_type:
-                stats['api_count'] += 1
-            elif 'ui' in case_type:
-                stats['ui_count'] += 1
-            elif 'data' in case_type:
-                stats['data_count'] += 1
+            # 单次扫描取出命中的类型关键词，按分组优先序归类
+            best = None
+            for m in _TC_TYPE_RE.finditer(case_type):
+                rank = _TC_TYPE_PRIORITY[m.lastgroup]
+                if best is None or rank < best[0]:
+                    best = (rank, m.lastgroup)
+            if best is not None:
+                stats[best[1]] += 1
             else:
                 stats['other_count'] += 1
 
@@ -470,13 +598,7 @@ class PostgresStorage:
         """保存测试用例生成结果"""
         with self.get_session() as session:
             # 处理测试用例
-            test_cases_data = []
-            for tc in result.get('test_cases', []):
-                if hasattr(tc, 'model_dump'):
-                    tc = tc.model_dump()
-                elif hasattr(tc, 'dict'):
-                    tc = tc.dict()
-                test_cases_data.append(tc)
+            test_cases_data = [_as_dict(tc) for tc in result.get('test_cases', [])]
 
             # 统计
             stats = self._count_testcases(test_cases_data)
@@ -508,7 +630,8 @@ class PostgresStorage:
             session.add(record)
             session.flush()
 
-            # 创建测试用例明细
+            # 创建测试用例明细 - Core 批量插入，避免逐行 add 产生 N 条 INSERT
+            rows = []
             for tc in test_cases_data:
                 priority = tc.get('priority', 'P2')
                 if hasattr(priority, 'value'):
@@ -518,19 +641,22 @@ class PostgresStorage:
                 if hasattr(case_type, 'value'):
                     case_type = case_type.value
 
-                item = TestCaseItem(
-                    generation_id=record.id,
-                    case_id=tc.get('case_id', ''),
-                    requirement_id=tc.get('requirement_id'),
-                    title=tc.get('title', ''),
-                    priority=str(priority),
-                    case_type=str(case_type),
-                    precondition=tc.get('precondition'),
-                    steps=json.dumps(tc.get('steps', []), ensure_ascii=False, default=str),
-                    test_data=tc.get('test_data'),
-                    tags=json.dumps(tc.get('tags', []), ensure_ascii=False)
-                )
-                session.add(item)
+                rows.append({
+                    'generation_id': record.id,
+                    'case_id': tc.get('case_id', ''),
+                    'requirement_id': tc.get('requirement_id'),
+                    'title': tc.get('title', ''),
+                    'priority': str(priority),
+                    'case_type': str(case_type),
+                    'precondition': tc.get('precondition'),
+                    'steps': tc.get('steps', []),
+                    'test_data': tc.get('test_data'),
+                    'tags': tc.get('tags', [])
+                })
+            if len(rows) >= self._COPY_THRESHOLD:
+                self._bulk_copy(session, TestCaseItem.__tablename__, list(rows[0]), rows)
+            elif rows:
+                session.execute(_TC_ITEM_INSERT, rows)
 
             return record.id
 
@@ -541,12 +667,31 @@ class PostgresStorage:
     ) -> List[Dict]:
         """获取需求分析历史记录"""
         with self.get_session() as session:
-            query = session.query(RequirementAnalysisRecord)
+            # 只读列表查询走 Core 列投影，跳过 ORM 实体构造与状态跟踪
+            stmt = select(
+                RequirementAnalysisRecord.id,
+                RequirementAnalysisRecord.document_id,
+                RequirementAnalysisRecord.document_name,
+                RequirementAnalysisRecord.analysis_time,
+                RequirementAnalysisRecord.ai_provider,
+                RequirementAnalysisRecord.total_requirements,
+                RequirementAnalysisRecord.total_issues,
+                RequirementAnalysisRecord.high_risk_count,
+                RequirementAnalysisRecord.medium_risk_count,
+                RequirementAnalysisRecord.low_risk_count,
+                RequirementAnalysisRecord.completeness_score,
+                RequirementAnalysisRecord.scenario_coverage_score,
+                RequirementAnalysisRecord.description_quality_score,
+                RequirementAnalysisRecord.testability_score,
+                RequirementAnalysisRecord.overall_score,
+                RequirementAnalysisRecord.summary,
+            )
 
             if document_id:
-                query = query.filter(RequirementAnalysisRecord.document_id == document_id)
+                stmt = stmt.where(RequirementAnalysisRecord.document_id == document_id)
 
-            records = query.order_by(RequirementAnalysisRecord.analysis_time.desc()).limit(limit).all()
+            stmt = stmt.order_by(RequirementAnalysisRecord.analysis_time.desc()).limit(limit)
+            records = session.execute(stmt).all()
 
             return [{
                 'id': r.id,
@@ -572,9 +717,13 @@ class PostgresStorage:
     def get_analysis_detail(self, analysis_id: int) -> Optional[Dict]:
         """获取需求分析详情"""
         with self.get_session() as session:
-            record = session.query(RequirementAnalysisRecord).filter(
-                RequirementAnalysisRecord.id == analysis_id
-            ).first()
+            # 主键取数走 session.get（可命中 identity map），
+            # selectinload 一次取回全部需求项，避免访问 relationship 时的补查
+            record = session.get(
+                RequirementAnalysisRecord,
+                analysis_id,
+                options=[selectinload(RequirementAnalysisRecord.requirements)],
+            )
 
             if not record:
                 return None
@@ -611,7 +760,7 @@ class PostgresStorage:
                 'testability_score': record.testability_score,
                 'overall_score': record.overall_score,
                 'summary': record.summary,
-                'improvement_suggestions': json.loads(record.improvement_suggestions or '[]'),
+                'improvement_suggestions': record.improvement_suggestions or [],
                 # 需求项明细
                 'requirements': [{
                     'req_id': item.req_id,
@@ -622,8 +771,8 @@ class PostgresStorage:
                     'high_risk_count': item.high_risk_count,
                     'medium_risk_count': item.medium_risk_count,
                     'low_risk_count': item.low_risk_count,
-                    'issues': json.loads(item.issues or '[]'),
-                    'suggestions': json.loads(item.suggestions or '[]')
+                    'issues': item.issues or [],
+                    'suggestions': item.suggestions or []
                 } for item in record.requirements]
             }
 
@@ -634,12 +783,26 @@ class PostgresStorage:
     ) -> List[Dict]:
         """获取测试用例生成历史"""
         with self.get_session() as session:
-            query = session.query(TestCaseGenerationRecord)
+            # 只读列表查询走 Core 列投影，跳过 ORM 实体构造与状态跟踪
+            stmt = select(
+                TestCaseGenerationRecord.id,
+                TestCaseGenerationRecord.document_id,
+                TestCaseGenerationRecord.document_name,
+                TestCaseGenerationRecord.generation_time,
+                TestCaseGenerationRecord.ai_provider,
+                TestCaseGenerationRecord.total_cases,
+                TestCaseGenerationRecord.p0_count,
+                TestCaseGenerationRecord.p1_count,
+                TestCaseGenerationRecord.p2_count,
+                TestCaseGenerationRecord.p3_count,
+                TestCaseGenerationRecord.coverage_summary,
+            )
 
             if document_id:
-                query = query.filter(TestCaseGenerationRecord.document_id == document_id)
+                stmt = stmt.where(TestCaseGenerationRecord.document_id == document_id)
 
-            records = query.order_by(TestCaseGenerationRecord.generation_time.desc()).limit(limit).all()
+            stmt = stmt.order_by(TestCaseGenerationRecord.generation_time.desc()).limit(limit)
+            records = session.execute(stmt).all()
 
             return [{
                 'id': r.id,
@@ -659,9 +822,13 @@ class PostgresStorage:
     def get_testcase_detail(self, generation_id: int) -> Optional[Dict]:
         """获取测试用例生成详情"""
         with self.get_session() as session:
-            record = session.query(TestCaseGenerationRecord).filter(
-                TestCaseGenerationRecord.id == generation_id
-            ).first()
+            # 主键取数走 session.get（可命中 identity map），
+            # selectinload 一次取回全部用例，避免访问 relationship 时的补查
+            record = session.get(
+                TestCaseGenerationRecord,
+                generation_id,
+                options=[selectinload(TestCaseGenerationRecord.test_cases)],
+            )
 
             if not record:
                 return None
@@ -701,57 +868,55 @@ class PostgresStorage:
                     'priority': tc.priority,
                     'case_type': tc.case_type,
                     'precondition': tc.precondition,
-                    'steps': json.loads(tc.steps or '[]'),
+                    'steps': tc.steps or [],
                     'test_data': tc.test_data,
-                    'tags': json.loads(tc.tags or '[]')
+                    'tags': tc.tags or []
                 } for tc in record.test_cases]
             }
 
     def get_statistics(self) -> Dict:
         """获取统计信息"""
         with self.get_session() as session:
-            from sqlalchemy import func
-
-            # 分析次数
-            analysis_count = session.query(func.count(RequirementAnalysisRecord.id)).scalar() or 0
-
-            # 测试用例生成次数
-            testcase_gen_count = session.query(func.count(TestCaseGenerationRecord.id)).scalar() or 0
-
-            # 平均分
-            avg_score = session.query(func.avg(RequirementAnalysisRecord.overall_score)).scalar() or 0
-
-            # 总测试用例数
-            total_cases = session.query(func.sum(TestCaseGenerationRecord.total_cases)).scalar() or 0
+            # 标量子查询合并为一条语句，单次往返取回全部统计量
+            stmt = select(
+                select(func.count(RequirementAnalysisRecord.id))
+                .scalar_subquery().label('analysis_count'),
+                select(func.count(TestCaseGenerationRecord.id))
+                .scalar_subquery().label('testcase_gen_count'),
+                select(func.avg(RequirementAnalysisRecord.overall_score))
+                .scalar_subquery().label('avg_score'),
+                select(func.sum(TestCaseGenerationRecord.total_cases))
+                .scalar_subquery().label('total_cases'),
+            )
+            row = session.execute(stmt).one()
 
             return {
-                'total_analysis_count': analysis_count,
-                'total_testcase_generations': testcase_gen_count,
-                'average_score': round(float(avg_score), 1),
-                'total_test_cases': int(total_cases),
+                'total_analysis_count': row.analysis_count or 0,
+                'total_testcase_generations': row.testcase_gen_count or 0,
+                'average_score': round(float(row.avg_score or 0), 1),
+                'total_test_cases': int(row.total_cases or 0),
                 'database_type': 'postgresql'
             }
 
     def delete_analysis(self, analysis_id: int) -> bool:
-        """删除需求分析记录"""
+        """删除需求分析记录
+
+        直接发 DELETE 语句，省掉先 SELECT 整行再逐条级联删除的往返；
+        子表清理由外键的 ondelete='CASCADE' 在数据库侧完成。
+        """
         with self.get_session() as session:
-            record = session.query(RequirementAnalysisRecord).filter(
+            deleted = session.query(RequirementAnalysisRecord).filter(
                 RequirementAnalysisRecord.id == analysis_id
-            ).first()
-
-            if record:
-                session.delete(record)
-                return True
-            return False
+            ).delete(synchronize_session=False)
+            return deleted > 0
 
     def delete_testcase(self, generation_id: int) -> bool:
-        """删除测试用例生成记录"""
+        """删除测试用例生成记录
+
+        与 delete_analysis 同理，单条 DELETE 依赖数据库级联。
+        """
         with self.get_session() as session:
-            record = session.query(TestCaseGenerationRecord).filter(
+            deleted = session.query(TestCaseGenerationRecord).filter(
                 TestCaseGenerationRecord.id == generation_id
-            ).first()
-
-            if record:
-                session.delete(record)
-                return True
-            return False
+            ).delete(synchronize_session=False)
+            return deleted > 0
@@ -2,44 +2,80 @@
 报告生成服务
 """
 import os
+from collections import Counter, OrderedDict
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from jinja2 import Environment, FileSystemLoader
+import aiofiles
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
 
 from app.config import get_settings
 from app.models import TaskResponse, ReportResponse, Severity
 
 
+# 问题严重级别标记（模块级常量，避免逐条问题重建字典）
+_SEVERITY_EMOJI = {"error": "🔴", "warning": "🟡", "info": "🔵"}
+
+
 class ReportGenerator:
     """报告生成器"""
 
     def __init__(self):
         self.settings = get_settings()
         template_dir = Path(__file__).parent.parent / "templates"
-        self.env = Environment(loader=FileSystemLoader(str(template_dir)))
+        # 编译后的模板字节码落盘，进程重启后冷启动免去重新 parse + codegen
+        bytecode_dir = os.path.join(self.settings.report_dir, ".jinja_cache")
+        os.makedirs(bytecode_dir, exist_ok=True)
+        # 模板不热更新：关闭 mtime 检查并在此一次性编译，渲染时直接复用
+        self.env = Environment(
+            loader=FileSystemLoader(str(template_dir)),
+            bytecode_cache=FileSystemBytecodeCache(directory=bytecode_dir),
+            auto_reload=False,
+            cache_size=-1,
+        )
+        self._html_template = self.env.get_template("report.html")
+        # 渲染结果缓存：同一份报告常被先后以 HTML / Markdown 各取一次
+        self._render_cache: "OrderedDict[tuple, str]" = OrderedDict()
+
+    _RENDER_CACHE_MAX = 128
+
+    def _render_cached(self, report: ReportResponse, format: str) -> str:
+        """带 LRU 缓存的渲染入口，键包含 generated_at 以便报告重生成后失效"""
+        key = (report.task_id, format, report.generated_at)
+        cached = self._render_cache.get(key)
+        if cached is not None:
+            self._render_cache.move_to_end(key)
+            return cached
+
+        if format == "html":
+            content = self._html_template.render(report=report)
+        else:
+            content = "\n".join(self._iter_markdown_lines(report))
+
+        self._render_cache[key] = content
+        if len(self._render_cache) > self._RENDER_CACHE_MAX:
+            self._render_cache.popitem(last=False)
+        return content
 
     def generate_report_data(self, task: TaskResponse) -> ReportResponse:
         """生成报告数据"""
         if not task.results:
             raise ValueError("任务尚未完成检测")
 
-        # 统计问题数量
-        error_count = 0
-        warning_count = 0
-        info_count = 0
-
-        for result in task.results:
-            for issue in result.issues:
-                if issue.severity == Severity.ERROR:
-                    error_count += 1
-                elif issue.severity == Severity.WARNING:
-                    warning_count += 1
-                else:
-                    info_count += 1
-
-        return ReportResponse(
+        # 优先读取检测完成时聚合好的计数；旧任务数据没有该字段时
+        # 退回一次全量统计（Counter 在 C 层累加，免去逐条的分支判断）
+        counts = task.severity_counts
+        if counts is None:
+            counts = Counter(
+                issue.severity.value for result in task.results for issue in result.issues
+            )
+        error_count = counts.get(Severity.ERROR.value, 0)
+        warning_count = counts.get(Severity.WARNING.value, 0)
+        info_count = sum(counts.values()) - error_count - warning_count
+
+        # 数据全部来自已完成的内部任务，跳过 Pydantic 的递归校验
+        return ReportResponse.model_construct(
             task_id=task.task_id,
             document=task.document,
             overall_score=task.overall_score or 0,
@@ -54,55 +90,63 @@ class ReportGenerator:
 
     def render_html(self, report: ReportResponse) -> str:
         """渲染 HTML 报告"""
-        template = self.env.get_template("report.html")
-        return template.render(report=report)
+        return self._render_cached(report, "html")
 
     def render_markdown(self, report: ReportResponse) -> str:
         """渲染 Markdown 报告"""
-        lines = [
-            f"# 文档检测报告",
-            f"",
-            f"## 基本信息",
-            f"- **文档名称**: {report.document.filename}",
-            f"- **文件类型**: {report.document.file_type.value.upper()}",
-            f"- **检测时间**: {report.generated_at.strftime('%Y-%m-%d %H:%M:%S')}",
-            f"",
-            f"## 整体评估",
-            f"- **综合得分**: {report.overall_score} / 100",
-            f"- **问题总数**: {report.total_issues} (错误: {report.error_count}, 警告: {report.warning_count}, 提示: {report.info_count})",
-            f"",
-            f"### 总结",
-            f"{report.summary}",
-            f"",
-            f"---",
-            f"",
-            f"## 详细检测结果",
-        ]
+        return self._render_cached(report, "md")
+
+    @staticmethod
+    def _iter_markdown_lines(report: ReportResponse):
+        """按段落产出 Markdown 文本块
+
+        静态框架合并为整块 f-string、逐段 yield，大报告不再经过
+        每行一次 append 的列表累积。
+        """
+        generated_at = report.generated_at.strftime('%Y-%m-%d %H:%M:%S')
+
+        yield (
+            "# 文档检测报告\n"
+            "\n"
+            "## 基本信息\n"
+            f"- **文档名称**: {report.document.filename}\n"
+            f"- **文件类型**: {report.document.file_type.value.upper()}\n"
+            f"- **检测时间**: {generated_at}\n"
+            "\n"
+            "## 整体评估\n"
+            f"- **综合得分**: {report.overall_score} / 100\n"
+            f"- **问题总数**: {report.total_issues} (错误: {report.error_count}, 警告: {report.warning_count}, 提示: {report.info_count})\n"
+            "\n"
+            "### 总结\n"
+            f"{report.summary}\n"
+            "\n"
+            "---\n"
+            "\n"
+            "## 详细检测结果"
+        )
 
         for result in report.results:
-            lines.append(f"")
-            lines.append(f"### {result.dimension.value.upper()} 检测")
-            lines.append(f"- **得分**: {result.score}")
-            lines.append(f"- **总结**: {result.summary}")
+            yield (
+                f"\n### {result.dimension.value.upper()} 检测\n"
+                f"- **得分**: {result.score}\n"
+                f"- **总结**: {result.summary}"
+            )
 
             if result.issues:
-                lines.append(f"")
-                lines.append(f"#### 发现的问题")
+                yield "\n#### 发现的问题"
                 for i, issue in enumerate(result.issues, 1):
-                    severity_emoji = {"error": "🔴", "warning": "🟡", "info": "🔵"}
-                    emoji = severity_emoji.get(issue.severity.value, "⚪")
-                    lines.append(f"")
-                    lines.append(f"**{i}. {emoji} [{issue.severity.value.upper()}]** {issue.description}")
+                    emoji = _SEVERITY_EMOJI.get(issue.severity.value, "⚪")
+                    block = f"\n**{i}. {emoji} [{issue.severity.value.upper()}]** {issue.description}"
                     if issue.location:
-                        lines.append(f"   - 位置: {issue.location}")
+                        block += f"\n   - 位置: {issue.location}"
                     if issue.suggestion:
-                        lines.append(f"   - 建议: {issue.suggestion}")
-
-        lines.append(f"")
-        lines.append(f"---")
-        lines.append(f"*报告生成时间: {report.generated_at.strftime('%Y-%m-%d %H:%M:%S')}*")
+                        block += f"\n   - 建议: {issue.suggestion}"
+                    yield block
 
-        return "\n".join(lines)
+        yield (
+            "\n---\n"
+            f"*报告生成时间: {generated_at}*"
+        )
 
     async def save_report(
         self,
@@ -123,7 +167,8 @@ class ReportGenerator:
         else:
             raise ValueError(f"不支持的报告格式: {format}")
 
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(content)
+        # 报告可达数 MB，同步写盘会卡住事件循环，交给 aiofiles 线程池
+        async with aiofiles.open(filepath, "w", encoding="utf-8") as f:
+            await f.write(content)
 
         return filepath
@@ -1,28 +1,179 @@
 """
 需求文档分析服务 - 检测需求完整性、场景覆盖、描述质量
 """
+import asyncio
+import hashlib
 import json
-from typing import Optional, List
+import re
+from functools import lru_cache
+from typing import Optional, List, Tuple
 from datetime import datetime
 
+from pydantic import TypeAdapter
+
 from app.config import get_settings
 from app.models import (
     RequirementAnalysisResult, RequirementItem,
-    TestCase, TestStep, TestCaseGenerationResult,
+    TestCase, TestCaseGenerationResult,
     TestCasePriority, TestCaseType
 )
 from app.services.ai_providers import get_ai_provider
+from app.services.llm_cache import LLMResponseCache
+
+# orjson 的 C 解析器比标准库快数倍，未安装时退回标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 提示词版本：修改上面的系统提示词时递增，旧缓存条目随之自然失效
+_PROMPT_VERSION = "v1"
+
+# Markdown 一至三级标题，超长文档按标题切块
+_HEADING_RE = re.compile(r'^#{1,3} ', re.M)
+
+# 单个分块的字符预算
+_CHUNK_MAX_CHARS = 8000
+
+
+def _split_by_headings(content: str, max_chars: int = _CHUNK_MAX_CHARS) -> List[str]:
+    """按 Markdown 标题切分文档，贪心合并相邻小节直到单块预算
+
+    没有标题的纯文本退化为单块返回（由调用方决定是否继续整体分析）；
+    超过预算的单个小节不再细分，保持语义完整。
+    """
+    starts = [m.start() for m in _HEADING_RE.finditer(content)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    sections = [content[s:e] for s, e in zip(starts, starts[1:] + [len(content)])]
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_len = 0
+    for section in sections:
+        if current and current_len + len(section) > max_chars:
+            chunks.append("".join(current))
+            current, current_len = [], 0
+        current.append(section)
+        current_len += len(section)
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+def _merge_analysis_data(parts: List[dict], weights: List[int]) -> dict:
+    """合并各分块的分析数据：需求项拼接、建议去重、得分按块长加权"""
+    total_weight = sum(weights) or 1
+
+    requirements: List[dict] = []
+    suggestions: List[str] = []
+    seen = set()
+    total_requirements = 0
+    for part in parts:
+        part_reqs = part.get("requirements", [])
+        requirements.extend(part_reqs)
+        total_requirements += int(part.get("total_requirements", len(part_reqs)))
+        for suggestion in part.get("improvement_suggestions", []):
+            if suggestion not in seen:
+                seen.add(suggestion)
+                suggestions.append(suggestion)
+
+    def weighted(key: str) -> float:
+        return round(
+            sum(float(part.get(key, 0)) * weight for part, weight in zip(parts, weights))
+            / total_weight,
+            1,
+        )
+
+    return {
+        "requirements": requirements,
+        "total_requirements": total_requirements,
+        "completeness_score": weighted("completeness_score"),
+        "scenario_coverage_score": weighted("scenario_coverage_score"),
+        "description_quality_score": weighted("description_quality_score"),
+        "testability_score": weighted("testability_score"),
+        "overall_score": weighted("overall_score"),
+        "summary": "\n".join(part.get("summary", "") for part in parts if part.get("summary")),
+        "improvement_suggestions": suggestions,
+    }
+
+# 全局并发闸门：限制同时在途的 LLM 调用数，批量分析时不至于
+# 压到提供商限流后进入重试放大（与 DocumentParser 的信号量同一做法）
+_llm_sem: Optional[asyncio.Semaphore] = None
+
+
+def _get_llm_sem() -> asyncio.Semaphore:
+    global _llm_sem
+    if _llm_sem is None:
+        _llm_sem = asyncio.Semaphore(get_settings().llm_concurrency)
+    return _llm_sem
+
+# 解析结果缓存：相同 (提示词版本, 模型, 文档内容) 的 LLM 响应直接复用，
+# 与 ai_providers 的检测缓存同一套 LRU + TTL 机制
+_result_cache = LLMResponseCache(maxsize=256, ttl=3600)
+
+# 整表校验器：一次调用在 pydantic-core（Rust）里完成全部条目的
+# 构建与校验，替代逐条目、逐字段的 Python 循环
+_REQUIREMENT_LIST_ADAPTER = TypeAdapter(List[RequirementItem])
+_TESTCASE_LIST_ADAPTER = TypeAdapter(List[TestCase])
+
+# LLM 字段到枚举的映射（模块级常量，避免每条用例重建字典）
+_PRIORITY_MAP = {"P0": TestCasePriority.P0, "P1": TestCasePriority.P1,
+                 "P2": TestCasePriority.P2, "P3": TestCasePriority.P3}
+
+_TYPE_MAP = {
+    "functional": TestCaseType.FUNCTIONAL,
+    "boundary": TestCaseType.BOUNDARY,
+    "exception": TestCaseType.EXCEPTION,
+    "performance": TestCaseType.PERFORMANCE,
+    "security": TestCaseType.SECURITY,
+    "compatibility": TestCaseType.COMPATIBILITY,
+    "usability": TestCaseType.USABILITY,
+    "api": TestCaseType.API,
+    "ui": TestCaseType.UI,
+    "data": TestCaseType.DATA,
+    "regression": TestCaseType.REGRESSION,
+    "smoke": TestCaseType.SMOKE,
+    "integration": TestCaseType.INTEGRATION,
+    # 安全测试子类型
+    "sql_injection": TestCaseType.SQL_INJECTION,
+    "xss": TestCaseType.XSS,
+    "csrf": TestCaseType.CSRF,
+    "auth": TestCaseType.AUTH,
+    "permission": TestCaseType.PERMISSION,
+    "sensitive_data": TestCaseType.SENSITIVE_DATA,
+    # 兼容性测试子类型
+    "mobile_compat": TestCaseType.MOBILE_COMPAT,
+    "browser_compat": TestCaseType.BROWSER_COMPAT,
+    "resolution_compat": TestCaseType.RESOLUTION_COMPAT,
+    # 接口测试子类型
+    "api_contract": TestCaseType.API_CONTRACT,
+    "api_security": TestCaseType.API_SECURITY,
+    "api_performance": TestCaseType.API_PERFORMANCE,
+    # UI测试子类型
+    "ui_interaction": TestCaseType.UI_INTERACTION,
+    "ui_responsive": TestCaseType.UI_RESPONSIVE,
+    "ui_accessibility": TestCaseType.UI_ACCESSIBILITY,
+    # 性能测试子类型
+    "load": TestCaseType.LOAD,
+    "stress": TestCaseType.STRESS,
+    "concurrent": TestCaseType.CONCURRENT,
+    # 其他类型
+    "reliability": TestCaseType.RELIABILITY,
+    "recovery": TestCaseType.RECOVERY,
+    "upgrade": TestCaseType.UPGRADE,
+    "localization": TestCaseType.LOCALIZATION,
+    "database": TestCaseType.DATABASE,
+    "cache": TestCaseType.CACHE,
+    "log": TestCaseType.LOG,
+    "monitor": TestCaseType.MONITOR,
+}
 
 
-class RequirementAnalyzer:
-    """需求文档分析器"""
-
-    def __init__(self, ai_provider_name: Optional[str] = None):
-        self.ai_provider = get_ai_provider(ai_provider_name)
-
-    async def analyze_requirements(self, content: str) -> RequirementAnalysisResult:
-        """分析需求文档"""
-        prompt = """你是一个拥有10年经验的**业务分析师和产品经理**。请站在业务视角对需求文档进行深度分析，重点关注**业务逻辑、用户体验、商业价值**层面的问题。
+# 提示词为模块级常量：每次调用复用同一对象，稳定的请求前缀也便于
+# 提供商侧的 prompt 缓存命中
+_ANALYZE_PROMPT = """你是一个拥有10年经验的**业务分析师和产品经理**。请站在业务视角对需求文档进行深度分析，重点关注**业务逻辑、用户体验、商业价值**层面的问题。
 
 ## 🎯 分析视角（业务优先）
 
@@ -145,50 +296,7 @@ class RequirementAnalyzer:
 只返回 JSON，不要其他内容。
 """
 
-        try:
-            response = await self.ai_provider.client.chat.completions.create(
-                model=self.ai_provider.model,
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": f"请分析以下需求文档：\n\n{content}"}
-                ],
-                temperature=0.3
-            )
-
-            result_text = response.choices[0].message.content
-            result_text = self._clean_json(result_text)
-            data = json.loads(result_text)
-
-            # 解析需求项
-            requirements = []
-            for req in data.get("requirements", []):
-                requirements.append(RequirementItem(
-                    req_id=req.get("req_id", ""),
-                    title=req.get("title", ""),
-                    description=req.get("description", ""),
-                    priority=req.get("priority"),
-                    issues=req.get("issues", []),
-                    suggestions=req.get("suggestions", [])
-                ))
-
-            return RequirementAnalysisResult(
-                total_requirements=data.get("total_requirements", len(requirements)),
-                analyzed_requirements=requirements,
-                completeness_score=float(data.get("completeness_score", 0)),
-                scenario_coverage_score=float(data.get("scenario_coverage_score", 0)),
-                description_quality_score=float(data.get("description_quality_score", 0)),
-                testability_score=float(data.get("testability_score", 0)),
-                overall_score=float(data.get("overall_score", 0)),
-                summary=data.get("summary", ""),
-                improvement_suggestions=data.get("improvement_suggestions", [])
-            )
-
-        except Exception as e:
-            raise Exception(f"需求分析失败: {str(e)}")
-
-    async def generate_test_cases(self, content: str, document_id: str) -> TestCaseGenerationResult:
-        """根据需求文档生成测试用例"""
-        prompt = """你是一个拥有15年经验的资深测试架构师。请根据需求文档为每个功能点生成**全面、详细、具体、可执行**的测试用例。
+_TESTCASE_PROMPT = """你是一个拥有15年经验的资深测试架构师。请根据需求文档为每个功能点生成**全面、详细、具体、可执行**的测试用例。
 
 ## 🎯 核心目标
 为每个功能点生成**至少20-30个测试用例**，确保全方位覆盖各种测试场景。用例要具体、可执行、有真实数据。
@@ -329,116 +437,187 @@ class RequirementAnalyzer:
 只返回 JSON，不要其他内容。
 """
 
-        try:
+
+class RequirementAnalyzer:
+    """需求文档分析器"""
+
+    def __init__(self, ai_provider_name: Optional[str] = None):
+        self.ai_provider = get_ai_provider(ai_provider_name)
+
+    async def _call_llm(self, prompt: str, user_content: str) -> str:
+        """单次 LLM 调用，返回清理后的 JSON 文本"""
+        async with _get_llm_sem():
             response = await self.ai_provider.client.chat.completions.create(
                 model=self.ai_provider.model,
                 messages=[
                     {"role": "system", "content": prompt},
-                    {"role": "user", "content": f"请根据以下需求文档生成测试用例：\n\n{content}"}
+                    {"role": "user", "content": user_content}
                 ],
                 temperature=0.3
             )
-
-            result_text = response.choices[0].message.content
-            result_text = self._clean_json(result_text)
-            data = json.loads(result_text)
-
-            # 解析测试用例
-            test_cases = []
-            for tc in data.get("test_cases", []):
-                steps = []
-                for step in tc.get("steps", []):
-                    steps.append(TestStep(
-                        step_number=step.get("step_number", 1),
-                        action=step.get("action", ""),
-                        expected_result=step.get("expected_result", "")
-                    ))
-
-                # 解析优先级
-                priority_map = {"P0": TestCasePriority.P0, "P1": TestCasePriority.P1,
-                               "P2": TestCasePriority.P2, "P3": TestCasePriority.P3}
-                priority = priority_map.get(tc.get("priority", "P2"), TestCasePriority.P2)
-
-                # 解析类型
-                type_map = {
-                    "functional": TestCaseType.FUNCTIONAL,
-                    "boundary": TestCaseType.BOUNDARY,
-                    "exception": TestCaseType.EXCEPTION,
-                    "performance": TestCaseType.PERFORMANCE,
-                    "security": TestCaseType.SECURITY,
-                    "compatibility": TestCaseType.COMPATIBILITY,
-                    "usability": TestCaseType.USABILITY,
-                    "api": TestCaseType.API,
-                    "ui": TestCaseType.UI,
-                    "data": TestCaseType.DATA,
-                    "regression": TestCaseType.REGRESSION,
-                    "smoke": TestCaseType.SMOKE,
-                    "integration": TestCaseType.INTEGRATION,
-                    # 安全测试子类型
-                    "sql_injection": TestCaseType.SQL_INJECTION,
-                    "xss": TestCaseType.XSS,
-                    "csrf": TestCaseType.CSRF,
-                    "auth": TestCaseType.AUTH,
-                    "permission": TestCaseType.PERMISSION,
-                    "sensitive_data": TestCaseType.SENSITIVE_DATA,
-                    # 兼容性测试子类型
-                    "mobile_compat": TestCaseType.MOBILE_COMPAT,
-                    "browser_compat": TestCaseType.BROWSER_COMPAT,
-                    "resolution_compat": TestCaseType.RESOLUTION_COMPAT,
-                    # 接口测试子类型
-                    "api_contract": TestCaseType.API_CONTRACT,
-                    "api_security": TestCaseType.API_SECURITY,
-                    "api_performance": TestCaseType.API_PERFORMANCE,
-                    # UI测试子类型
-                    "ui_interaction": TestCaseType.UI_INTERACTION,
-                    "ui_responsive": TestCaseType.UI_RESPONSIVE,
-                    "ui_accessibility": TestCaseType.UI_ACCESSIBILITY,
-                    # 性能测试子类型
-                    "load": TestCaseType.LOAD,
-                    "stress": TestCaseType.STRESS,
-                    "concurrent": TestCaseType.CONCURRENT,
-                    # 其他类型
-                    "reliability": TestCaseType.RELIABILITY,
-                    "recovery": TestCaseType.RECOVERY,
-                    "upgrade": TestCaseType.UPGRADE,
-                    "localization": TestCaseType.LOCALIZATION,
-                    "database": TestCaseType.DATABASE,
-                    "cache": TestCaseType.CACHE,
-                    "log": TestCaseType.LOG,
-                    "monitor": TestCaseType.MONITOR,
-                }
-                case_type = type_map.get(tc.get("case_type", "functional"), TestCaseType.FUNCTIONAL)
-
-                test_cases.append(TestCase(
-                    case_id=tc.get("case_id", ""),
-                    requirement_id=tc.get("requirement_id"),
-                    title=tc.get("title", ""),
-                    priority=priority,
-                    case_type=case_type,
-                    precondition=tc.get("precondition"),
-                    steps=steps,
-                    test_data=tc.get("test_data"),
-                    tags=tc.get("tags", [])
-                ))
-
-            return TestCaseGenerationResult(
-                document_id=document_id,
-                total_cases=len(test_cases),
-                test_cases=test_cases,
-                coverage_summary=data.get("coverage_summary", ""),
-                generated_at=datetime.now()
+        return self._clean_json(response.choices[0].message.content)
+
+    def _cache_key(self, kind: str, content: str) -> str:
+        """缓存键：提示词版本 + 模型 + 调用类型 + 文档内容摘要"""
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return f"{_PROMPT_VERSION}|{self.ai_provider.model}|{kind}|{digest}"
+
+    async def _analysis_data(self, content: str) -> dict:
+        """取得需求分析的原始数据，命中缓存时跳过 LLM 调用
+
+        超过 doc_chunk_threshold 的长文档按标题切块并发分析后合并
+        （map-reduce），整体耗时随并发上限近似线性下降。
+        """
+        key = self._cache_key("analyze", content)
+        data = _result_cache.get(key)
+        if data is not None:
+            return data
+
+        chunks = (
+            _split_by_headings(content)
+            if len(content) > get_settings().doc_chunk_threshold
+            else [content]
+        )
+        if len(chunks) > 1:
+            texts = await asyncio.gather(*[
+                self._call_llm(_ANALYZE_PROMPT, f"请分析以下需求文档：\n\n{chunk}")
+                for chunk in chunks
+            ])
+            parts = [await asyncio.to_thread(_json_loads, text) for text in texts]
+            data = _merge_analysis_data(parts, [len(chunk) for chunk in chunks])
+        else:
+            result_text = await self._call_llm(
+                _ANALYZE_PROMPT, f"请分析以下需求文档：\n\n{content}"
+            )
+            data = await asyncio.to_thread(_json_loads, result_text)
+
+        _result_cache.set(key, data)
+        return data
+
+    async def _testcase_data(self, content: str) -> dict:
+        """取得测试用例生成的原始数据，命中缓存时跳过 LLM 调用"""
+        key = self._cache_key("testcase", content)
+        data = _result_cache.get(key)
+        if data is None:
+            result_text = await self._call_llm(
+                _TESTCASE_PROMPT, f"请根据以下需求文档生成测试用例：\n\n{content}"
+            )
+            data = await asyncio.to_thread(_json_loads, result_text)
+            _result_cache.set(key, data)
+        return data
+
+    async def analyze_and_generate(
+        self, content: str, document_id: str
+    ) -> Tuple[RequirementAnalysisResult, TestCaseGenerationResult]:
+        """需求分析与测试用例生成并发执行
+
+        两次 LLM 往返同时发出，整体耗时取较慢的一次；返回的大 JSON
+        在线程池中解析，不阻塞事件循环。
+        """
+        try:
+            analysis_data, testcase_data = await asyncio.gather(
+                self._analysis_data(content),
+                self._testcase_data(content),
             )
+            analysis = self._build_analysis_result(analysis_data)
+            testcases = self._build_testcase_result(testcase_data, document_id)
+            return analysis, testcases
+        except Exception as e:
+            raise Exception(f"需求分析与用例生成失败: {str(e)}")
+
+    async def analyze_requirements(self, content: str) -> RequirementAnalysisResult:
+        """分析需求文档"""
+        try:
+            return self._build_analysis_result(await self._analysis_data(content))
+
+        except Exception as e:
+            raise Exception(f"需求分析失败: {str(e)}")
+
+    def _build_analysis_result(self, data: dict) -> RequirementAnalysisResult:
+        """从 LLM 返回的数据构建需求分析结果"""
+        # 补齐 LLM 可能缺失的必填字段后整表交给 pydantic-core 校验
+        raw_reqs = data.get("requirements", [])
+        max_reqs = get_settings().max_requirements
+        if len(raw_reqs) > max_reqs:
+            print(f"[需求分析] 需求项超限，截断 {len(raw_reqs)} -> {max_reqs}")
+            raw_reqs = raw_reqs[:max_reqs]
+        for req in raw_reqs:
+            req.setdefault("req_id", "")
+            req.setdefault("title", "")
+            req.setdefault("description", "")
+        requirements = _REQUIREMENT_LIST_ADAPTER.validate_python(raw_reqs)
+
+        return RequirementAnalysisResult(
+            total_requirements=data.get("total_requirements", len(requirements)),
+            analyzed_requirements=requirements,
+            completeness_score=float(data.get("completeness_score", 0)),
+            scenario_coverage_score=float(data.get("scenario_coverage_score", 0)),
+            description_quality_score=float(data.get("description_quality_score", 0)),
+            testability_score=float(data.get("testability_score", 0)),
+            overall_score=float(data.get("overall_score", 0)),
+            summary=data.get("summary", ""),
+            improvement_suggestions=data.get("improvement_suggestions", [])
+        )
+
+    async def generate_test_cases(self, content: str, document_id: str) -> TestCaseGenerationResult:
+        """根据需求文档生成测试用例"""
+        try:
+            data = await self._testcase_data(content)
+            return self._build_testcase_result(data, document_id)
 
         except Exception as e:
             raise Exception(f"测试用例生成失败: {str(e)}")
 
+    def _build_testcase_result(self, data: dict, document_id: str) -> TestCaseGenerationResult:
+        """从 LLM 返回的数据构建测试用例生成结果"""
+        # 归一化枚举字段、补齐缺失项后整表交给 pydantic-core 校验，
+        # 免去逐用例、逐步骤的 Python 对象构造
+        settings = get_settings()
+        raw_cases = data.get("test_cases", [])
+        if len(raw_cases) > settings.max_test_cases:
+            print(f"[用例生成] 用例数超限，截断 {len(raw_cases)} -> {settings.max_test_cases}")
+            raw_cases = raw_cases[:settings.max_test_cases]
+        max_steps = settings.max_steps_per_case
+        for tc in raw_cases:
+            tc.setdefault("case_id", "")
+            tc.setdefault("title", "")
+            tc["priority"] = _PRIORITY_MAP.get(tc.get("priority", "P2"), TestCasePriority.P2)
+            tc["case_type"] = _TYPE_MAP.get(tc.get("case_type", "functional"), TestCaseType.FUNCTIONAL)
+            steps = tc.get("steps")
+            if steps is None:
+                tc["steps"] = []
+            else:
+                if len(steps) > max_steps:
+                    steps = steps[:max_steps]
+                    tc["steps"] = steps
+                for step in steps:
+                    step.setdefault("step_number", 1)
+                    step.setdefault("action", "")
+                    step.setdefault("expected_result", "")
+        test_cases = _TESTCASE_LIST_ADAPTER.validate_python(raw_cases)
+
+        return TestCaseGenerationResult(
+            document_id=document_id,
+            total_cases=len(test_cases),
+            test_cases=test_cases,
+            coverage_summary=data.get("coverage_summary", ""),
+            generated_at=datetime.now()
+        )
+
     def _clean_json(self, text: str) -> str:
         """清理 JSON 文本"""
         text = text.strip()
         if text.startswith("```"):
-            lines = text.split("\n")
-            lines = lines[1:-1] if lines[-1] == "```" else lines[1:]
-            text = "\n".join(lines)
+            # 按下标切片去掉代码围栏，免去对大响应整段 split + join
+            start = text.find("\n") + 1
+            end = text.rfind("```")
+            text = text[start:end] if end >= start else text[start:]
         if text.startswith("json"):
             text = text[4:]
         return text.strip()
+
+
+@lru_cache(maxsize=None)
+def get_requirement_analyzer(ai_provider_name: Optional[str] = None) -> RequirementAnalyzer:
+    """获取需求分析器实例（按提供商名称缓存的单例）"""
+    return RequirementAnalyzer(ai_provider_name)
@@ -1,27 +1,41 @@
 """
 存储服务工厂 - PostgreSQL 数据库存储
 """
-from app.services.postgres_storage import PostgresStorage
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.services.postgres_storage import PostgresStorage
 
 _storage_instance = None
+# 双重检查加锁：并发首次请求时只构造一个实例（只开一个连接池）
+_storage_lock = threading.Lock()
 
 
-def get_storage() -> PostgresStorage:
+def get_storage() -> "PostgresStorage":
     """获取PostgreSQL存储实例（必须连接成功）"""
     global _storage_instance
-    
-    if _storage_instance is None:
-        _storage_instance = PostgresStorage()
+
+    instance = _storage_instance
+    if instance is None:
+        with _storage_lock:
+            instance = _storage_instance
+            if instance is None:
+                # 延迟到首次使用才 import，应用启动不必加载 SQLAlchemy
+                from app.services.postgres_storage import PostgresStorage
+                instance = PostgresStorage()
+                _storage_instance = instance
 
     # 检查数据库连接状态
-    if not _storage_instance.is_connected():
-        error_msg = _storage_instance.get_connection_error() or "未知错误"
+    if not instance.is_connected():
+        error_msg = instance.get_connection_error() or "未知错误"
         raise Exception(f"数据库连接失败: {error_msg}。请检查 .env 配置文件中的数据库配置。")
 
-    return _storage_instance
+    return instance
 
 
 def reset_storage():
     """重置存储实例"""
     global _storage_instance
-    _storage_instance = None
+    with _storage_lock:
+        _storage_instance = None
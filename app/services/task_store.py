@@ -0,0 +1,64 @@
+"""
+任务存储 - 默认进程内存储，配置 redis_url 后切换为 Redis 以支持多 worker 部署
+"""
+from typing import Dict, Optional
+
+from app.config import get_settings
+from app.models import TaskResponse
+
+# 任务记录保留 1 天；文档内容体积大，只保留 1 小时
+_TASK_TTL = 86400
+_CONTENT_TTL = 3600
+
+
+class InMemoryTaskStore:
+    """单进程内存存储（默认）"""
+
+    def __init__(self):
+        self._tasks: Dict[str, TaskResponse] = {}
+        self._contents: Dict[str, str] = {}
+
+    async def put_task(self, task_id: str, task: TaskResponse):
+        self._tasks[task_id] = task
+
+    async def get_task(self, task_id: str) -> Optional[TaskResponse]:
+        return self._tasks.get(task_id)
+
+    async def put_content(self, task_id: str, content: str):
+        self._contents[task_id] = content
+
+    async def get_content(self, task_id: str) -> Optional[str]:
+        return self._contents.get(task_id)
+
+
+class RedisTaskStore:
+    """Redis 存储：任务状态跨 worker 共享，TTL 限制内存占用"""
+
+    def __init__(self, redis_url: str):
+        import redis.asyncio as aioredis
+        self._redis = aioredis.from_url(redis_url, decode_responses=True)
+
+    async def put_task(self, task_id: str, task: TaskResponse):
+        await self._redis.set(f"task:{task_id}", task.model_dump_json(), ex=_TASK_TTL)
+
+    async def get_task(self, task_id: str) -> Optional[TaskResponse]:
+        data = await self._redis.get(f"task:{task_id}")
+        return TaskResponse.model_validate_json(data) if data else None
+
+    async def put_content(self, task_id: str, content: str):
+        await self._redis.set(f"content:{task_id}", content, ex=_CONTENT_TTL)
+
+    async def get_content(self, task_id: str) -> Optional[str]:
+        return await self._redis.get(f"content:{task_id}")
+
+
+_store = None
+
+
+def get_task_store():
+    """获取任务存储实例（按配置选择后端，首次调用时创建）"""
+    global _store
+    if _store is None:
+        redis_url = get_settings().redis_url
+        _store = RedisTaskStore(redis_url) if redis_url else InMemoryTaskStore()
+    return _store
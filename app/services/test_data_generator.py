@@ -1,14 +1,47 @@
 """
 测试数据生成器 - 使用Faker生成真实多样的测试数据
 """
-from faker import Faker
-from typing import Dict, List, Optional, Any
+import asyncio
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Any
 import random
 import json
 
-# 创建中文Faker实例
-fake = Faker('zh_CN')
-fake_en = Faker('en_US')
+# orjson 的 C 序列化比标准库快数倍，未安装时退回标准库
+try:
+    import orjson
+
+    def _dumps_pretty(data) -> str:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    def _dumps_pretty(data) -> str:
+        return json.dumps(data, ensure_ascii=False, indent=2)
+
+@lru_cache(maxsize=8)
+def _faker(locale: str):
+    """按地区缓存的 Faker 实例（faker 包较重，首次用到才 import）"""
+    from faker import Faker
+    return Faker(locale)
+
+
+class _LazyFaker:
+    """延迟构造的 Faker 代理
+
+    Faker 初始化要加载全部 provider 和地区数据（上百毫秒），
+    首次真正用到时才构造，import 本模块不再付这笔启动开销。
+    """
+    __slots__ = ('_locale',)
+
+    def __init__(self, locale: str):
+        self._locale = locale
+
+    def __getattr__(self, name):
+        return getattr(_faker(self._locale), name)
+
+
+# 中文/英文 Faker 实例（惰性）
+fake = _LazyFaker('zh_CN')
+fake_en = _LazyFaker('en_US')
 
 
 class TestDataGenerator:
@@ -127,34 +160,27 @@ class TestDataGenerator:
     }
 
     @classmethod
-    def generate_for_field(cls, field_name: str, field_type: str = None) -> Any:
-        """根据字段名生成测试数据"""
-        field_lower = field_name.lower()
-
-        # 精确匹配
-        if field_lower in cls.FIELD_PATTERNS:
-            return cls.FIELD_PATTERNS[field_lower]()
-
-        # 模糊匹配
-        for pattern, generator in cls.FIELD_PATTERNS.items():
-            if pattern in field_lower or field_lower in pattern:
-                return generator()
+    def _field_generator(cls, field_name: str, field_type: str = None) -> Callable:
+        """解析字段对应的零参生成器，兜底链与单字段生成一致"""
+        # 精确/模糊匹配统一走缓存的解析结果：生成数据集时同一列名
+        # 每条记录都会查一次，缓存后只扫描全部模式一次
+        generator = _resolve_generator(field_name.lower())
+        if generator is not None:
+            return generator
 
         # 根据字段类型
         if field_type:
-            if field_type in ('string', 'str', 'varchar', 'text'):
-                return fake.word()
-            elif field_type in ('int', 'integer', 'number'):
-                return random.randint(1, 1000)
-            elif field_type in ('float', 'double', 'decimal'):
-                return round(random.uniform(0, 1000), 2)
-            elif field_type in ('bool', 'boolean'):
-                return random.choice([True, False])
-            elif field_type in ('date', 'datetime'):
-                return fake.date()
+            generator = _TYPE_GENERATORS.get(field_type)
+            if generator is not None:
+                return generator
 
         # 默认返回随机字符串
-        return fake.word()
+        return _TYPE_GENERATORS['string']
+
+    @classmethod
+    def generate_for_field(cls, field_name: str, field_type: str = None) -> Any:
+        """根据字段名生成测试数据"""
+        return cls._field_generator(field_name, field_type)()
 
     @classmethod
     def generate_boundary_data(cls, field_name: str, data_type: str = 'string') -> Dict[str, Any]:
@@ -182,15 +208,16 @@ class TestDataGenerator:
         Returns:
             测试数据列表
         """
-        dataset = []
-        for _ in range(count):
-            record = {}
-            for field in fields:
-                field_name = field.get('name', '')
-                field_type = field.get('type', 'string')
-                record[field_name] = cls.generate_for_field(field_name, field_type)
-            dataset.append(record)
-        return dataset
+        # 每个字段只解析一次生成器，逐行生成时免去每格的名称匹配
+        resolved = [
+            (field.get('name', ''),
+             cls._field_generator(field.get('name', ''), field.get('type', 'string')))
+            for field in fields
+        ]
+        return [
+            {name: generator() for name, generator in resolved}
+            for _ in range(count)
+        ]
 
     @classmethod
     def generate_for_scenario(cls, scenario: str) -> Dict[str, Any]:
@@ -246,7 +273,7 @@ class TestDataGenerator:
     def format_test_data(cls, data: Dict, format_type: str = 'json') -> str:
         """格式化测试数据"""
         if format_type == 'json':
-            return json.dumps(data, ensure_ascii=False, indent=2)
+            return _dumps_pretty(data)
         elif format_type == 'table':
             lines = []
             for key, value in data.items():
@@ -261,6 +288,54 @@ class TestDataGenerator:
             return str(data)
 
 
+# 字段类型兜底生成器：与 FIELD_PATTERNS 同为零参 callable
+_TYPE_GENERATORS = {
+    'string': lambda: fake.word(),
+    'str': lambda: fake.word(),
+    'varchar': lambda: fake.word(),
+    'text': lambda: fake.word(),
+    'int': lambda: random.randint(1, 1000),
+    'integer': lambda: random.randint(1, 1000),
+    'number': lambda: random.randint(1, 1000),
+    'float': lambda: round(random.uniform(0, 1000), 2),
+    'double': lambda: round(random.uniform(0, 1000), 2),
+    'decimal': lambda: round(random.uniform(0, 1000), 2),
+    'bool': lambda: random.choice([True, False]),
+    'boolean': lambda: random.choice([True, False]),
+    'date': lambda: fake.date(),
+    'datetime': lambda: fake.date(),
+}
+
+
+@lru_cache(maxsize=4096)
+def _resolve_generator(field_lower: str) -> Optional[Callable]:
+    """解析字段名对应的生成器（结果按字段名缓存）
+
+    先精确命中，再退化为与 FIELD_PATTERNS 键的双向子串模糊匹配；
+    返回 None 表示需按字段类型兜底。
+    """
+    patterns = TestDataGenerator.FIELD_PATTERNS
+    generator = patterns.get(field_lower)
+    if generator is not None:
+        return generator
+
+    for pattern, generator in patterns.items():
+        if pattern in field_lower or field_lower in pattern:
+            return generator
+    return None
+
+
+async def generate_test_dataset_async(fields: List[Dict], count: int = 5) -> List[Dict]:
+    """generate_test_dataset 的异步封装
+
+    小批量直接同步生成（开销低于一次线程切换）；大批量的纯 Python
+    Faker 循环放线程池执行，不阻塞事件循环里的其他请求。
+    """
+    if count * len(fields) < 200:
+        return TestDataGenerator.generate_test_dataset(fields, count)
+    return await asyncio.to_thread(TestDataGenerator.generate_test_dataset, fields, count)
+
+
 # 便捷函数
 def generate_test_data(field_name: str, field_type: str = None) -> Any:
     """生成单个字段的测试数据"""
@@ -6,7 +6,7 @@ from pathlib import Path
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 
 from app.config import get_settings
 from app.routers import documents, check, reports, requirements
@@ -43,7 +43,9 @@ app = FastAPI(
     """,
     version="1.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    # 所有 JSON 响应默认走 orjson 序列化，大结果集下明显省 CPU
+    default_response_class=ORJSONResponse
 )
 
 # CORS 配置
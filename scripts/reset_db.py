@@ -17,17 +17,17 @@ def reset_database():
     
     print(f"连接数据库: {settings.db_host}:{settings.db_port}/{settings.db_name}")
     
-    # 删除旧表
-    with engine.connect() as conn:
-        conn.execute(text('DROP TABLE IF EXISTS test_cases CASCADE'))
-        conn.execute(text('DROP TABLE IF EXISTS testcase_generation CASCADE'))
-        conn.execute(text('DROP TABLE IF EXISTS requirement_items CASCADE'))
-        conn.execute(text('DROP TABLE IF EXISTS requirement_analysis CASCADE'))
-        conn.commit()
+    # 删除旧表：一条语句删四张表，远程数据库下少三次往返；
+    # engine.begin() 自动提交，也省掉显式 commit 的一次往返
+    with engine.begin() as conn:
+        conn.execute(text(
+            'DROP TABLE IF EXISTS test_cases, testcase_generation, '
+            'requirement_items, requirement_analysis CASCADE'
+        ))
     print("已删除旧表")
-    
-    # 重新创建表
-    Base.metadata.create_all(engine)
+
+    # 重新创建表（刚清空过，无需逐表探测是否存在）
+    Base.metadata.create_all(engine, checkfirst=False)
     print("已创建新表")
     
     print("\n表结构更新完成！")
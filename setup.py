@@ -0,0 +1,20 @@
+"""
+可选的 Cython 编译脚本 - 把 app/models.py 编译为 C 扩展以加速 Pydantic 校验
+运行方式: python setup.py build_ext --inplace
+
+未安装 Cython 时服务照常以纯 Python 运行，此脚本仅用于需要额外性能的部署。
+"""
+from setuptools import setup
+
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    ext_modules = []
+    print("[setup] 未安装 Cython，跳过编译（pip install cython 后重试）")
+else:
+    ext_modules = cythonize(["app/models.py"], language_level=3)
+
+setup(
+    name="ai-test-service",
+    ext_modules=ext_modules,
+)